@@ -10,10 +10,15 @@ import sqlite3
 import logging
 import traceback
 import hashlib
+import pickle
 import shutil
+import threading
+import time
+from contextlib import closing
 from pathlib import Path
 from datetime import datetime
 from io import BytesIO
+from uuid import uuid4
 
 import streamlit as st
 import pandas as pd
@@ -47,6 +52,9 @@ REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = APP_DIR / "ayurprakriti.db"
 LOG_PATH = APP_DIR / "app_debug.log"
 
+# characters in patient names that are unsafe in report filenames (Windows included)
+_SAFE_FILENAME_TBL = str.maketrans({" ": "_", "/": "-", "\\": "-", ":": "-"})
+
 # Attempt to copy logo from shared container path (/mnt/data/logo.png) if present.
 # Useful for Streamlit Cloud where you can upload files in the GUI (they land under /mnt/data)
 SRC_LOGO = Path("/mnt/data/logo.png")
@@ -62,6 +70,20 @@ except Exception:
     # Not fatal — we'll just proceed without a logo
     pass
 
+# -------------------- JSON (orjson if available) --------------------
+# orjson is a C-backed (de)serializer; fall back to the stdlib if it isn't installed.
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        # sqlite3 binds TEXT from str, so decode the bytes orjson produces
+        return orjson.dumps(obj).decode("utf-8")
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 # -------------------- Logging --------------------
 logger = logging.getLogger("ayurprakriti_mega")
 if not logger.handlers:
@@ -108,55 +130,86 @@ except Exception:
         return False
 
 # -------------------- Database initialization --------------------
-def init_db():
-    conn = sqlite3.connect(str(DB_PATH))
-    cur = conn.cursor()
-    cur.execute(
-        """
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        display_name TEXT,
-        password_hash TEXT,
-        role TEXT,
-        created_at TEXT
-    );
+# Hot scalar scores get their own REAL columns so the dashboard can read them without
+# parsing JSON; data_json keeps only the free-text/nested parts of the payload.
+# (column, payload section, key)
+ASSESSMENT_SCORE_COLUMNS = [
+    ("prakriti_v", "prakriti", "Vata"),
+    ("prakriti_p", "prakriti", "Pitta"),
+    ("prakriti_k", "prakriti", "Kapha"),
+    ("vikriti_v", "vikriti", "Vata"),
+    ("vikriti_p", "vikriti", "Pitta"),
+    ("vikriti_k", "vikriti", "Kapha"),
+    ("psych_extraversion", "psych", "extraversion"),
+    ("psych_anxiety", "psych", "anxiety"),
+    ("psych_burnout", "psych", "burnout"),
+]
+_SCORE_SECTIONS = ("prakriti", "vikriti", "psych")
+_SCORE_COLS_SQL = ",".join(c for c, _, _ in ASSESSMENT_SCORE_COLUMNS)
+
+# created_at is INTEGER epoch milliseconds: cheaper to bind and to ORDER BY than ISO text
+_ASSESSMENTS_DDL = (
     """
-    )
-    cur.execute(
-        """
-    CREATE TABLE IF NOT EXISTS patients (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        age INTEGER,
-        gender TEXT,
-        contact TEXT,
-        created_at TEXT
-    );
-    """
-    )
-    cur.execute(
-        """
-    CREATE TABLE IF NOT EXISTS assessments (
+    CREATE TABLE IF NOT EXISTS {table} (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         patient_id INTEGER,
         assessor TEXT,
         data_json TEXT,
-        created_at TEXT,
-        FOREIGN KEY(patient_id) REFERENCES patients(id)
-    );
-    """
+        created_at INTEGER,
+        """
+    + "".join(f"{c} REAL,\n        " for c, _, _ in ASSESSMENT_SCORE_COLUMNS)
+    + """FOREIGN KEY(patient_id) REFERENCES patients(id)
     )
-    # create default admin if missing
-    cur.execute("SELECT COUNT(1) FROM users")
-    if cur.fetchone()[0] == 0:
-        ph = hash_password("admin123")
-        cur.execute(
-            "INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,?)",
-            ("admin", "Administrator", ph, "admin", datetime.now().isoformat()),
+    """
+)
+
+@st.cache_resource
+def init_db():
+    # runs once per process (not on every rerun): DDL, migrations and the admin seed only need to happen once
+    # closing() guarantees the handle is released; the inner `with conn` commits the admin seed
+    # (DDL statements autocommit under the default isolation level)
+    with closing(sqlite3.connect(str(DB_PATH))) as conn, conn:
+        # WAL lets dashboard SELECTs from other sessions proceed while a write is in flight
+        conn.execute("PRAGMA journal_mode=WAL")
+        cur = conn.cursor()
+        cur.executescript(
+            """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            display_name TEXT,
+            password_hash TEXT,
+            role TEXT,
+            created_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS patients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            age INTEGER,
+            gender TEXT,
+            contact TEXT,
+            created_at TEXT
+        );
+        """
         )
-    conn.commit()
-    conn.close()
+        cur.execute(_ASSESSMENTS_DDL.format(table="assessments"))
+        # migrate older DBs: add any missing typed score columns
+        info = {r[1]: r[2] for r in cur.execute("PRAGMA table_info(assessments)")}
+        for col, _, _ in ASSESSMENT_SCORE_COLUMNS:
+            if col not in info:
+                cur.execute(f"ALTER TABLE assessments ADD COLUMN {col} REAL")
+        # an existing created_at TEXT column is left as is (no table rebuild): the DB is shared with the
+        # Wow Report app, which still writes ISO text there and adds its own columns. Readers accept both
+        # forms, see _created_at_local.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_assess_created ON assessments(created_at DESC)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_assess_patient ON assessments(patient_id)")
+        # create default admin if missing
+        if cur.execute("SELECT COUNT(1) FROM users").fetchone()[0] == 0:
+            ph = hash_password("admin123")
+            cur.execute(
+                "INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,?)",
+                ("admin", "Administrator", ph, "admin", datetime.now().isoformat()),
+            )
 
 init_db()
 
@@ -202,36 +255,34 @@ _psy_label_map = {
     "stress": "Stress",
 }
 
+def _clean_bullets(text: str) -> list:
+    """Split free-text bullets into stripped lines, dropping blank ones."""
+    return [l.strip() for l in (text or "").splitlines() if l.strip()]
+
 def _psy_label_display(k: str) -> str:
     return _psy_label_map.get(k.lower(), k.title())
 
-def _career_rationale_for_report(cr: dict, prakriti_pct: dict, vikriti_pct: dict, psych_pct: dict) -> str:
+def _career_rationale_for_report(cr: dict, dominant: str, vdom: str, top_psy: str) -> str:
     """
     Return a slightly longer, personalized rationale for career suggestions.
     cr: dict with keys role, score, features (optional)
+    dominant / vdom / top_psy: precomputed top keys of prakriti, vikriti and psych (or None)
     """
     role = cr.get("role", "Role")
     score = cr.get("score", 0)
     reason = cr.get("reason", "")
-    # infer dosha-based phrasing
-    dominant = max(prakriti_pct, key=prakriti_pct.get) if prakriti_pct else None
-    vdom = max(vikriti_pct, key=vikriti_pct.get) if vikriti_pct else None
-    psych_note = ""
-    if psych_pct:
-        top_psy = max(psych_pct, key=psych_pct.get)
-        psych_note = f" Psychometric note: higher {top_psy}."
-    part = []
+    parts = []
     if dominant:
-        part.append(f"Matches dominant {dominant}.")
+        parts.append(f"Matches dominant {dominant}.")
     if vdom and vdom != dominant:
-        part.append(f"Current imbalance: {vdom}.")
-    base = " ".join(part)
+        parts.append(f"Current imbalance: {vdom}.")
     if reason:
-        base = (base + " ") if base else ""
-        base += reason
-    base = base + psych_note
+        parts.append(reason)
+    if top_psy:
+        parts.append(f"Psychometric note: higher {top_psy}.")
     # ensure it is neutral/3rd-person
-    return _neutralize_personal_tone(base).rstrip(" .") + f". Score: {score}"
+    base = _neutralize_personal_tone(" ".join(parts)).rstrip(" .")
+    return f"{base}. Score: {score}"
 
 # -------------------- Chart utilities --------------------
 def _make_bar_chart(data_dict: dict, title: str, out_path: Path):
@@ -255,12 +306,13 @@ def make_radar_chart(prakriti: dict, vikriti: dict, out_path: Path):
     import math
 
     N = len(labels)
-    vals1 = [prakriti.get(k, 0) for k in labels]
-    vals2 = [vikriti.get(k, 0) for k in labels]
-    angles = [n / float(N) * 2 * math.pi for n in range(N)]
-    angles += angles[:1]
-    vals1 += vals1[:1]
-    vals2 += vals2[:1]
+    # build closed polygons as ndarrays so matplotlib consumes them without conversion
+    angles = np.linspace(0, 2 * np.pi, N, endpoint=False)
+    angles = np.concatenate([angles, angles[:1]])
+    vals1 = np.fromiter((prakriti.get(k, 0) for k in labels), dtype=np.float64, count=N)
+    vals1 = np.concatenate([vals1, vals1[:1]])
+    vals2 = np.fromiter((vikriti.get(k, 0) for k in labels), dtype=np.float64, count=N)
+    vals2 = np.concatenate([vals2, vals2[:1]])
     fig = plt.figure(figsize=(4, 4))
     ax = fig.add_subplot(111, polar=True)
     ax.set_theta_offset(math.pi / 2)
@@ -269,7 +321,7 @@ def make_radar_chart(prakriti: dict, vikriti: dict, out_path: Path):
     ax.fill(angles, vals1, alpha=0.25)
     ax.plot(angles, vals2, linewidth=1, linestyle="dashed", label="Vikriti")
     ax.fill(angles, vals2, alpha=0.15)
-    ax.set_thetagrids([a * 180 / math.pi for a in angles[:-1]], labels)
+    ax.set_thetagrids(np.degrees(angles[:-1]), labels)
     ax.set_rlabel_position(0)
     ax.set_ylim(0, 100)
     ax.legend(loc='upper right', bbox_to_anchor=(1.1, 1.1))
@@ -278,48 +330,47 @@ def make_radar_chart(prakriti: dict, vikriti: dict, out_path: Path):
     plt.close(fig)
 
 # -------------------- Dosha-specific priority actions --------------------
+# Static lookup table: the action strips never change, so build them once at import.
+_PRIORITY_DEFAULT = [
+    ("Start today",
+     "Warm water; light stretching; freshly cooked meals; avoid heavy dinners."),
+    ("This week",
+     "3 x 20–25 min walks; fix wake-up time; reduce screen after 9 PM."),
+    ("This month",
+     "Regular meals & sleep; weekly clearing activity; small self-improvement habit."),
+]
+
+_PRIORITY_BY_DOSHA = {
+    "Vata": [
+        ("Start today (Vata grounding)",
+         "Warm water on waking; 5–10 min gentle oil rub or slow stretch; Eat warm, cooked meals; Avoid cold/raw foods early."),
+        ("This week",
+         "Fix sleep time; 3 gentle walks; short calming breathing practice daily."),
+        ("This month",
+         "Regular meal timings; 2–3 light yoga sessions/week; declutter environment."),
+    ],
+    "Pitta": [
+        ("Start today (Pitta cooling)",
+         "Room-temp/warm water; 5–10 min cooling breath (Sheetali); prefer cooling foods; avoid heavy/spicy evening meals."),
+        ("This week",
+         "Reduce stimulants after 4 PM; 3 moderate walks avoiding heat; add cooling herbs like coriander."),
+        ("This month",
+         "Establish relaxed work rhythm; evening self-care for cooling; hydrate consistently."),
+    ],
+    "Kapha": [
+        ("Start today (Kapha lightening)",
+         "Warm water with pinch dry ginger; 5–10 min brisk stretch; choose lighter meals (soups, moong)."),
+        ("This week",
+         "4 brisk walks; reduce refined sugars; start morning activity habit."),
+        ("This month",
+         "Build regular morning routine; move every 60–90 minutes at work; add warming spices."),
+    ],
+    "": _PRIORITY_DEFAULT,
+}
+
 def dosha_priority_actions(vikriti_pct: dict):
-    try:
-        dominant_vikriti = max(vikriti_pct, key=vikriti_pct.get)
-    except Exception:
-        dominant_vikriti = ""
-    if dominant_vikriti == "Vata":
-        priority = [
-            ("Start today (Vata grounding)",
-             "Warm water on waking; 5–10 min gentle oil rub or slow stretch; Eat warm, cooked meals; Avoid cold/raw foods early."),
-            ("This week",
-             "Fix sleep time; 3 gentle walks; short calming breathing practice daily."),
-            ("This month",
-             "Regular meal timings; 2–3 light yoga sessions/week; declutter environment."),
-        ]
-    elif dominant_vikriti == "Pitta":
-        priority = [
-            ("Start today (Pitta cooling)",
-             "Room-temp/warm water; 5–10 min cooling breath (Sheetali); prefer cooling foods; avoid heavy/spicy evening meals."),
-            ("This week",
-             "Reduce stimulants after 4 PM; 3 moderate walks avoiding heat; add cooling herbs like coriander."),
-            ("This month",
-             "Establish relaxed work rhythm; evening self-care for cooling; hydrate consistently."),
-        ]
-    elif dominant_vikriti == "Kapha":
-        priority = [
-            ("Start today (Kapha lightening)",
-             "Warm water with pinch dry ginger; 5–10 min brisk stretch; choose lighter meals (soups, moong)."),
-            ("This week",
-             "4 brisk walks; reduce refined sugars; start morning activity habit."),
-            ("This month",
-             "Build regular morning routine; move every 60–90 minutes at work; add warming spices."),
-        ]
-    else:
-        priority = [
-            ("Start today",
-             "Warm water; light stretching; freshly cooked meals; avoid heavy dinners."),
-            ("This week",
-             "3 x 20–25 min walks; fix wake-up time; reduce screen after 9 PM."),
-            ("This month",
-             "Regular meals & sleep; weekly clearing activity; small self-improvement habit."),
-        ]
-    return priority
+    dominant_vikriti = max(vikriti_pct, key=vikriti_pct.get) if vikriti_pct else ""
+    return _PRIORITY_BY_DOSHA.get(dominant_vikriti, _PRIORITY_DEFAULT)
 
 # -------------------- PDF generation --------------------
 def branded_pdf_report(
@@ -336,14 +387,21 @@ def branded_pdf_report(
     wow=None,
     guideline_text=None,
     doctor_note=None,
+    out_path=None,
 ):
+    """
+    Build the branded PDF report.
+    If out_path is given the PDF is written straight to that file and the path is returned;
+    otherwise the PDF is built in memory and a BytesIO is returned.
+    """
     if wconf is None:
         wconf = {}
-    # generate charts
-    p1 = TMP_DIR / f"prakriti_{int(datetime.now().timestamp())}.png"
-    p2 = TMP_DIR / f"vikriti_{int(datetime.now().timestamp())}.png"
-    p3 = TMP_DIR / f"psych_{int(datetime.now().timestamp())}.png"
-    radar = TMP_DIR / f"radar_{int(datetime.now().timestamp())}.png"
+    # generate charts (one unique suffix per report so concurrent builds never collide)
+    tag = uuid4().hex[:8]
+    p1 = TMP_DIR / f"prakriti_{tag}.png"
+    p2 = TMP_DIR / f"vikriti_{tag}.png"
+    p3 = TMP_DIR / f"psych_{tag}.png"
+    radar = TMP_DIR / f"radar_{tag}.png"
     try:
         _make_bar_chart(prakriti_pct, "Prakriti (constitutional %)", p1)
         _make_bar_chart(vikriti_pct, "Vikriti (today %)", p2)
@@ -353,7 +411,7 @@ def branded_pdf_report(
         logger.exception("Chart generation failed")
 
     try:
-        buf = BytesIO()
+        buf = str(out_path) if out_path else BytesIO()
         doc = SimpleDocTemplate(
             buf,
             pagesize=A4,
@@ -371,6 +429,11 @@ def branded_pdf_report(
         styles.add(ParagraphStyle(name="AP_Body", fontName=base_font, fontSize=10, leading=13))
         styles.add(ParagraphStyle(name="AP_Bullet", fontName=base_font, fontSize=10, leading=12, leftIndent=12, bulletIndent=6))
 
+        # dominant keys are reused by the badges and every career rationale
+        dom_prakriti = max(prakriti_pct, key=prakriti_pct.get) if prakriti_pct else None
+        dom_vikriti = max(vikriti_pct, key=vikriti_pct.get) if vikriti_pct else None
+        top_psych = max(psych_pct, key=psych_pct.get) if psych_pct else None
+
         flow = []
         # Header / cover
         logo_path = TARGET_LOGO if TARGET_LOGO.exists() else None
@@ -392,11 +455,8 @@ def branded_pdf_report(
         flow.append(Spacer(1, 8))
 
         # badges
-        try:
-            dom = max(prakriti_pct, key=prakriti_pct.get) if prakriti_pct else "-"
-            cur = max(vikriti_pct, key=vikriti_pct.get) if vikriti_pct else "-"
-        except Exception:
-            dom = cur = "-"
+        dom = dom_prakriti or "-"
+        cur = dom_vikriti or "-"
         badges = [
             Paragraph(f"<b>Dominant</b><br/>{dom}", styles["AP_Body"]),
             Paragraph(f"<b>Current</b><br/>{cur}", styles["AP_Body"]),
@@ -489,7 +549,7 @@ def branded_pdf_report(
             if role in seen_roles:
                 continue
             seen_roles.add(role)
-            rationale = _career_rationale_for_report(cr, prakriti_pct, vikriti_pct, psych_pct)
+            rationale = _career_rationale_for_report(cr, dom_prakriti, dom_vikriti, top_psych)
             flow.append(Paragraph(f"• <b>{role}</b> — {rationale}", styles["AP_Bullet"]))
         flow.append(Spacer(1, 6))
 
@@ -594,19 +654,23 @@ def branded_pdf_report(
                 logger.exception("Footer drawing failed")
 
         doc.build(flow, onFirstPage=_draw_page_footer_and_watermark, onLaterPages=_draw_page_footer_and_watermark)
-        buf.seek(0)
-        # cleanup temp images
-        for p in [p1, p2, p3, radar]:
+        # cleanup temp images (anything left behind is swept by _startup_cleanup on next start)
+        for p in (p1, p2, p3, radar):
             try:
-                if p.exists():
-                    p.unlink()
-            except:
+                p.unlink(missing_ok=True)
+            except OSError:
                 pass
+        if out_path:
+            return out_path
+        buf.seek(0)
         return buf
     except Exception:
         tb = traceback.format_exc()
         logger.exception("Platypus build failed: %s", tb)
         # fallback simple PDF
+        if out_path:
+            Path(out_path).write_bytes(b"PDF generation failed. See logs.")
+            return out_path
         fallback = BytesIO()
         fallback.write(b"PDF generation failed. See logs.")
         fallback.seek(0)
@@ -623,8 +687,47 @@ def simple_career_recommender(prakriti_pct, vikriti_pct, psych_pct):
     ]
     return sample
 
+@st.cache_data
+def _career(prak: tuple, vik: tuple, psy: tuple):
+    """simple_career_recommender memoized on hashable (sorted item tuple) inputs."""
+    return simple_career_recommender(dict(prak), dict(vik), dict(psy))
+
+def pdf_content_key(args, kwargs) -> str:
+    """Stable digest of everything that affects the PDF content."""
+    return hashlib.blake2b(pickle.dumps((args, kwargs)), digest_size=16).hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_pdf(key: str, _args: tuple, _kwargs: dict) -> bytes:
+    """Render branded_pdf_report once per content key and return the PDF bytes.
+    Only `key` is hashed by Streamlit; identical inputs skip ReportLab and reuse the bytes."""
+    return branded_pdf_report(*_args, **_kwargs).getvalue()
+
+# static part of the 'wow' appendix; only doctor_note varies per assessment
+_WOW_TEMPLATE = {
+    "hero": "90-day plan for gentle restoration",
+    "plan": "Week 1-4: Stabilise routine\nWeek 5-8: Build activity\nWeek 9-12: Consolidate habits",
+    "habit_stack": "Morning: warm water -> short oil rub -> walk\nEvening: cooling breath -> early sleep",
+    "wow_tips": "Start with micro-habits. Avoid big changes.",
+    "checklist": "1) Warm water\n2) Sleep time\n3) 20-min walk",
+}
+
 # -------------------- Streamlit UI --------------------
 st.set_page_config(page_title="AyurPrakriti Pro Mega", layout="wide")
+
+@st.cache_resource
+def _startup_cleanup(max_age_s: int = 3600):
+    """Remove chart PNGs older than max_age_s from TMP_DIR; runs once per process."""
+    now = time.time()
+    with os.scandir(TMP_DIR) as it:
+        for e in it:
+            try:
+                if e.is_file() and now - e.stat().st_mtime > max_age_s:
+                    os.unlink(e.path)
+            except OSError:
+                pass
+    return True
+
+_startup_cleanup()
 st.title("AyurPrakriti Pro — Mega v2.0 (Demo)")
 
 # sidebar login
@@ -632,9 +735,128 @@ st.sidebar.header("Login")
 if "user" not in st.session_state:
     st.session_state["user"] = None
 
-conn = sqlite3.connect(str(DB_PATH))
+@st.cache_resource
+def get_conn():
+    """One tuned connection per process, reused across reruns and sessions.
+    isolation_level=None (autocommit) so writes batch through an explicit BEGIN/COMMIT."""
+    c = sqlite3.connect(str(DB_PATH), check_same_thread=False, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
+    c.row_factory = sqlite3.Row
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA temp_store=MEMORY")
+    # ~20MB page cache keeps the assessments pages and prepared plans hot
+    c.execute("PRAGMA cache_size=-20000")
+    return c
+
+@st.cache_resource
+def _db_write_lock():
+    """Serializes writes on the shared get_conn() connection: it has one transaction at a time,
+    so a second session's BEGIN (or commit/rollback) would otherwise act on the first one's."""
+    return threading.Lock()
+
+conn = get_conn()
 cur = conn.cursor()
 
+DASHBOARD_PAGE_SIZE = 200
+RECENT_ASSESSMENTS_COLUMNS = ["id", "patient_id", "assessor", "created_at", "name"]
+# newest first by rowid: created_at may mix epoch ms and ISO text (see _created_at_local), which don't sort together
+RECENT_ASSESSMENTS_SQL = "SELECT a.id,a.patient_id,a.assessor,a.created_at,p.name FROM assessments a LEFT JOIN patients p ON a.patient_id=p.id ORDER BY a.id DESC LIMIT ? OFFSET ?"
+
+def _created_at_local(col: pd.Series) -> pd.Series:
+    """created_at as local time: epoch ms (this app) or naive local ISO text (older rows, the Wow Report app)."""
+    tz = datetime.now().astimezone().tzinfo
+    ms = pd.to_numeric(col, errors="coerce")
+    out = pd.to_datetime(ms, unit="ms", utc=True).dt.as_unit("us")
+    iso = ms.isna() & col.notna()
+    if iso.any():
+        parsed = pd.to_datetime(col.where(iso), format="ISO8601").dt.tz_localize(tz).dt.tz_convert("UTC")
+        out = out.mask(iso, parsed.dt.as_unit("us"))
+    return out.dt.tz_convert(tz)
+
+@st.cache_data(ttl=30)
+def load_recent_assessments(db_path: str, page: int = 1):
+    """One dashboard page; cached so widget-driven reruns skip the join. Cleared on every assessment insert."""
+    with closing(sqlite3.connect(db_path)) as c:
+        rows = c.execute(RECENT_ASSESSMENTS_SQL, (DASHBOARD_PAGE_SIZE, DASHBOARD_PAGE_SIZE * (page - 1))).fetchall()
+    # fixed-shape result: build the frame directly instead of going through read_sql_query
+    df = pd.DataFrame.from_records(rows, columns=RECENT_ASSESSMENTS_COLUMNS)
+    df["created_at"] = _created_at_local(df["created_at"])
+    return df
+
+# flush queued assessments automatically once this many are pending
+PENDING_FLUSH_AT = 1000
+
+# Whole batch goes in as one JSON array parameter: one statement and one round-trip
+# regardless of batch size, and no "too many SQL variables" limit.
+_INSERT_ASSESSMENTS_SQL = (
+    f"INSERT INTO assessments (patient_id, assessor, data_json, created_at, {_SCORE_COLS_SQL}) "
+    "SELECT json_extract(value,'$.pid'), json_extract(value,'$.a'), json_extract(value,'$.d'), json_extract(value,'$.t'), "
+    + ", ".join(f"json_extract(value,'$.{c}')" for c, _, _ in ASSESSMENT_SCORE_COLUMNS)
+    + " FROM json_each(?)"
+)
+_SELECT_ASSESSMENT_SQL = f"SELECT data_json, {_SCORE_COLS_SQL} FROM assessments WHERE id=?"
+
+def assessment_row(patient_id, assessor, payload, created_at):
+    """Split a payload into an insert record: typed score columns + JSON object 'd' for everything else."""
+    row = {
+        "pid": patient_id,
+        "a": assessor,
+        "d": {k: v for k, v in payload.items() if k not in _SCORE_SECTIONS},
+        "t": created_at,
+    }
+    for col, sec, key in ASSESSMENT_SCORE_COLUMNS:
+        row[col] = payload.get(sec, {}).get(key)
+    return row
+
+def assessment_payload(data_json, scores):
+    """Inverse of assessment_row: rebuild the full payload dict from data_json and the score columns."""
+    data = {sec: {} for sec in _SCORE_SECTIONS}
+    for (_, sec, key), val in zip(ASSESSMENT_SCORE_COLUMNS, scores):
+        if val is not None:
+            data[sec][key] = val
+    data.update(_json_loads(data_json) if data_json else {})
+    return data
+
+def save_assessments(rows):
+    """Insert assessment rows built by assessment_row in a single transaction."""
+    if not rows:
+        return 0
+    with _db_write_lock():
+        try:
+            conn.execute("BEGIN")
+            cur.execute(_INSERT_ASSESSMENTS_SQL, (_json_dumps(rows),))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    load_recent_assessments.clear()
+    return len(rows)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def list_reports(mtime_ns: int):
+    """Sorted PDF names in REPORTS_DIR; rescanned only when the directory mtime changes."""
+    return sorted(p.name for p in REPORTS_DIR.glob("*.pdf"))
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def get_assessment(aid: int):
+    """Parsed payload of one assessment (rows are never updated, so no invalidation is needed)."""
+    row = conn.execute(_SELECT_ASSESSMENT_SQL, (aid,)).fetchone()
+    return assessment_payload(row[0], row[1:]) if row else None
+
+def flush_pending_assessments():
+    rows = st.session_state.get("pending_assessments", [])
+    n = save_assessments(rows)
+    st.session_state["pending_assessments"] = []
+    return n
+
+def queue_assessment(row, flush=False):
+    """Queue one assessment row; write the batch when asked to or when it reaches PENDING_FLUSH_AT."""
+    pending = st.session_state.setdefault("pending_assessments", [])
+    pending.append(row)
+    if flush or len(pending) >= PENDING_FLUSH_AT:
+        return flush_pending_assessments()
+    return 0
+
 def login_user(username, password):
     cur.execute("SELECT id, username, display_name, password_hash, role FROM users WHERE username=?", (username,))
     r = cur.fetchone()
@@ -672,73 +894,80 @@ with tabs[0]:
         gender = st.selectbox("Gender", ["Male", "Female", "Other"])
         contact = st.text_input("Contact")
         if st.button("Create patient"):
-            cur.execute("INSERT INTO patients (name, age, gender, contact, created_at) VALUES (?,?,?,?,?)", (name, int(age), gender, contact, datetime.now().isoformat()))
-            conn.commit()
+            with _db_write_lock():
+                cur.execute("INSERT INTO patients (name, age, gender, contact, created_at) VALUES (?,?,?,?,?)", (name, int(age), gender, contact, datetime.now().isoformat()))
+                conn.commit()
             st.success("Patient created")
 
     st.markdown("### All patients")
-    df = pd.read_sql_query("SELECT * FROM patients ORDER BY created_at DESC", conn)
+    df = pd.read_sql_query(
+        "SELECT id, name, age, gender, contact, created_at FROM patients ORDER BY created_at DESC",
+        conn,
+        dtype={"age": "Int16", "gender": "category"},
+    )
     st.dataframe(df)
 
 with tabs[1]:
     st.header("New Assessment")
     # pick patient
-    patients = pd.read_sql_query("SELECT id, name FROM patients ORDER BY name", conn)
-    pid = st.selectbox("Select patient", options=[None] + patients["id"].tolist(), format_func=lambda x: "Select..." if x is None else patients[patients["id"]==x]["name"].values[0])
+    patients = cur.execute("SELECT id, name FROM patients ORDER BY name").fetchall()
+    id_to_name = {p_id: p_name for p_id, p_name in patients}
+    pid = st.selectbox("Select patient", options=[None] + list(id_to_name), format_func=lambda x: "Select..." if x is None else id_to_name[x])
     if pid:
         pat_row = cur.execute("SELECT id, name, age, gender FROM patients WHERE id=?", (pid,)).fetchone()
         patient_obj = {"id": pat_row[0], "name": pat_row[1], "age": pat_row[2], "gender": pat_row[3]}
         st.write(f"Selected: **{patient_obj['name']}** (age {patient_obj['age']}, {patient_obj['gender']})")
 
-        # Minimal questionnaire (expandable)
-        st.subheader("Questionnaire (short demo)")
-        # -- Prakriti prompts (placeholder)
-        prakriti = {}
-        prakriti["Vata"] = st.slider("Vata tendency (%)", 0, 100, 35)
-        prakriti["Pitta"] = st.slider("Pitta tendency (%)", 0, 100, 35)
-        prakriti["Kapha"] = st.slider("Kapha tendency (%)", 0, 100, 30)
-
-        # -- Vikriti (current imbalance)
-        vikriti = {}
-        vikriti["Vata"] = st.slider("Vikriti - Vata (%)", 0, 100, 30)
-        vikriti["Pitta"] = st.slider("Vikriti - Pitta (%)", 0, 100, 30)
-        vikriti["Kapha"] = st.slider("Vikriti - Kapha (%)", 0, 100, 40)
-
-        # -- psychometric (simple)
-        psych = {}
-        psych["extraversion"] = st.slider("Extraversion (%)", 0, 100, 50)
-        psych["anxiety"] = st.slider("Anxiety (%)", 0, 100, 25)
-        psych["burnout"] = st.slider("Burnout (%)", 0, 100, 10)
-
-        # relationship & health free text
-        rel_text = st.text_area("Relationship tips (free text - clinician)", height=80)
-        health_diet = st.text_area("Health - Diet suggestions (simple bullets)", height=80)
-        health_life = st.text_area("Health - Lifestyle suggestions (simple bullets)", height=80)
-
-        include_appendix = st.checkbox("Include Appendix (90-day plan)", value=False)
-        doctor_note = st.text_area("Doctor highlighted note (optional)", height=80)
-        guideline_text = st.text_area("Full personalised guideline (optional)", height=140)
-        custom_doctor = st.text_input("Assessor/Doctor name", value=st.session_state["user"]["display_name"])
-
-        if st.button("Generate recommendations & PDF"):
-            career_recs = simple_career_recommender(prakriti, vikriti, psych)
+        # sliders/text areas live in a form so dragging them does not rerun the script;
+        # everything below only executes on submit
+        with st.form("assess"):
+            # Minimal questionnaire (expandable)
+            st.subheader("Questionnaire (short demo)")
+            # -- Prakriti prompts (placeholder)
+            prakriti = {}
+            prakriti["Vata"] = st.slider("Vata tendency (%)", 0, 100, 35)
+            prakriti["Pitta"] = st.slider("Pitta tendency (%)", 0, 100, 35)
+            prakriti["Kapha"] = st.slider("Kapha tendency (%)", 0, 100, 30)
+
+            # -- Vikriti (current imbalance)
+            vikriti = {}
+            vikriti["Vata"] = st.slider("Vikriti - Vata (%)", 0, 100, 30)
+            vikriti["Pitta"] = st.slider("Vikriti - Pitta (%)", 0, 100, 30)
+            vikriti["Kapha"] = st.slider("Vikriti - Kapha (%)", 0, 100, 40)
+
+            # -- psychometric (simple)
+            psych = {}
+            psych["extraversion"] = st.slider("Extraversion (%)", 0, 100, 50)
+            psych["anxiety"] = st.slider("Anxiety (%)", 0, 100, 25)
+            psych["burnout"] = st.slider("Burnout (%)", 0, 100, 10)
+
+            # relationship & health free text
+            rel_text = st.text_area("Relationship tips (free text - clinician)", height=80)
+            health_diet = st.text_area("Health - Diet suggestions (simple bullets)", height=80)
+            health_life = st.text_area("Health - Lifestyle suggestions (simple bullets)", height=80)
+
+            include_appendix = st.checkbox("Include Appendix (90-day plan)", value=False)
+            doctor_note = st.text_area("Doctor highlighted note (optional)", height=80)
+            guideline_text = st.text_area("Full personalised guideline (optional)", height=140)
+            custom_doctor = st.text_input("Assessor/Doctor name", value=st.session_state["user"]["display_name"])
+            batch_mode = st.checkbox("Queue assessment for batch save", value=False)
+            submitted = st.form_submit_button("Generate recommendations & PDF")
+
+        if submitted:
+            career_recs = _career(tuple(sorted(prakriti.items())), tuple(sorted(vikriti.items())), tuple(sorted(psych.items())))
             rel_tips = [("Tip 1", "Be patient and listen"), ("Tip 2", "Schedule weekly check-ins")]
-            health_recs = {"diet": health_diet.split("\n"), "lifestyle": health_life.split("\n")}
-            wow = {
-                "hero": "90-day plan for gentle restoration",
-                "doctor_note": doctor_note,
-                "plan": "Week 1-4: Stabilise routine\nWeek 5-8: Build activity\nWeek 9-12: Consolidate habits",
-                "habit_stack": "Morning: warm water -> short oil rub -> walk\nEvening: cooling breath -> early sleep",
-                "wow_tips": "Start with micro-habits. Avoid big changes.",
-                "checklist": "1) Warm water\n2) Sleep time\n3) 20-min walk"
-            }
-            buf = branded_pdf_report(patient_obj, prakriti, vikriti, psych, career_recs, rel_tips, health_recs, include_appendix=include_appendix, wconf={"watermark_text":"Kakunje Wellness","watermark_opacity":0.04}, wow=wow, guideline_text=guideline_text, doctor_note=doctor_note)
-            # save to reports dir
-            fname = REPORTS_DIR / f"Report_{patient_obj['name'].replace(' ', '_')}_{int(datetime.now().timestamp())}.pdf"
-            with open(fname, "wb") as f:
-                f.write(buf.getvalue())
+            health_recs = {"diet": _clean_bullets(health_diet), "lifestyle": _clean_bullets(health_life)}
+            wow = {**_WOW_TEMPLATE, "doctor_note": doctor_note}
+            pdf_args = (patient_obj, prakriti, vikriti, psych, career_recs, rel_tips, health_recs)
+            pdf_kwargs = dict(include_appendix=include_appendix, wconf={"watermark_text":"Kakunje Wellness","watermark_opacity":0.04}, wow=wow, guideline_text=guideline_text, doctor_note=doctor_note)
+            pdf_key = pdf_content_key(pdf_args, pdf_kwargs)
+            now_ts = datetime.now().timestamp()  # one clock read for both the filename and the DB row
+            fname = REPORTS_DIR / f"Report_{patient_obj['name'].translate(_SAFE_FILENAME_TBL)}_{int(now_ts)}.pdf"
+            # cache hit or miss, every assessment gets its own report file
+            pdf_bytes = build_pdf(pdf_key, pdf_args, pdf_kwargs)
+            fname.write_bytes(pdf_bytes)
             st.success("Report generated")
-            st.download_button("Download report", data=buf, file_name=fname.name, mime="application/pdf")
+            st.download_button("Download report", data=pdf_bytes, file_name=fname.name, mime="application/pdf")
             # save assessment to DB
             payload = {
                 "prakriti": prakriti,
@@ -751,29 +980,36 @@ with tabs[1]:
                 "doctor_note": doctor_note,
                 "guideline_text": guideline_text,
             }
-            cur.execute("INSERT INTO assessments (patient_id, assessor, data_json, created_at) VALUES (?,?,?,?)", (patient_obj["id"], custom_doctor, json.dumps(payload), datetime.now().isoformat()))
-            conn.commit()
-            st.info("Assessment saved to DB")
+            row = assessment_row(patient_obj["id"], custom_doctor, payload, int(now_ts * 1000))
+            if queue_assessment(row, flush=not batch_mode):
+                st.info("Assessment saved to DB")
+            else:
+                st.info(f"Assessment queued ({len(st.session_state['pending_assessments'])} pending)")
+
+    pending = st.session_state.get("pending_assessments", [])
+    if pending and st.button(f"Save batch ({len(pending)} pending)"):
+        st.success(f"Saved {flush_pending_assessments()} assessments to DB")
 
 with tabs[2]:
     st.header("Clinician Dashboard")
     st.write("Recent assessments")
-    df_as = pd.read_sql_query("SELECT a.id,a.patient_id,a.assessor,a.created_at,p.name FROM assessments a LEFT JOIN patients p ON a.patient_id=p.id ORDER BY a.created_at DESC", conn)
-    st.dataframe(df_as)
+    page = st.number_input("Page", min_value=1, value=1, step=1)
+    df_as = load_recent_assessments(str(DB_PATH), int(page))
+    st.dataframe(df_as, height=400)
     sel = st.selectbox("View assessment ID", options=[None] + df_as["id"].tolist())
     if sel:
-        row = cur.execute("SELECT data_json FROM assessments WHERE id=?", (sel,)).fetchone()
-        if row:
-            data = json.loads(row[0])
-            st.json(data)
+        # payload is parsed once per id (cached) and shown collapsed by default
+        with st.expander("Show JSON"):
+            data = get_assessment(int(sel))
+            if data is not None:
+                st.json(data)
 
 with tabs[3]:
     st.header("Config & Export")
     st.write("Reports directory:", REPORTS_DIR)
-    files = list(REPORTS_DIR.glob("*.pdf"))
-    for f in files:
-        st.write(f.name)
-        st.download_button("Download", data=open(f, "rb").read(), file_name=f.name, mime="application/pdf")
-
-# close DB
-conn.close()
+    # directory mtime changes whenever a report is added/removed, so it is a cheap cache key
+    for name in list_reports(os.stat(REPORTS_DIR).st_mtime_ns):
+        # only the report the user asks for is read from disk
+        with st.expander(name):
+            if st.button("Prepare download", key=f"prep_{name}"):
+                st.download_button("Download", data=(REPORTS_DIR / name).read_bytes(), file_name=name, mime="application/pdf", key=f"dl_{name}")
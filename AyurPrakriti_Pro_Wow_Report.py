@@ -4,28 +4,66 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from io import BytesIO
 from datetime import datetime, timedelta
-import os, json, shutil, logging, traceback
+import os, sys, json, shutil, logging, traceback, threading, textwrap, subprocess
+from functools import lru_cache
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from passlib.context import CryptContext
+from uuid import uuid4
 import yaml
-from docx import Document
-
-# ReportLab
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle, PageBreak
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.utils import ImageReader
-from reportlab.pdfgen import canvas
+from wow_report_pdf import (rl_base, register_dejavu, generate_wow_advice, render_bulk_report,
+                            branded_pdf_report as _render_branded_pdf)
+
+# orjson is a C-backed (de)serializer; fall back to the stdlib if it isn't installed
+try:
+    import orjson
+    # OPT_SERIALIZE_NUMPY: patient rows come from a DataFrame and may carry numpy scalars
+    _dumps = lambda o: orjson.dumps(o, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    _loads = orjson.loads
+except ImportError:
+    _dumps = lambda o: json.dumps(o, ensure_ascii=False)
+    _loads = json.loads
+
+# zstandard (optional): a compressed copy of each payload also goes in assessments.data_zst when available.
+# data_json is always written too: the other apps sharing this DB (and older versions) only read data_json.
+# Compressor objects aren't thread-safe, so one is made per call.
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+def _pack_payload(p):
+    # -> (data_json, data_zst)
+    js = _dumps(p)
+    return js, (zstd.ZstdCompressor(level=3).compress(js.encode('utf-8')) if zstd is not None else None)
+
+def _unpack_payload(data_json, data_zst):
+    # data_json when present (no decompression); rows saved by earlier versions may only have data_zst
+    if data_json is not None: return _loads(data_json)
+    if zstd is None: raise RuntimeError('assessment is zstd-compressed; install zstandard to read it')
+    return _loads(zstd.ZstdDecompressor().decompress(data_zst))
+
+# ---------------- Lazy heavy imports ----------------
+# matplotlib / reportlab / python-docx are imported on first chart or report, not at startup
+# (passlib likewise, inside get_pwd_context)
+@lru_cache(maxsize=1)
+def _mpl_figure():
+    import matplotlib
+    matplotlib.use('Agg')  # headless backend, no GUI toolkit needed on the server
+    from matplotlib.figure import Figure
+    return Figure
+
+def _rl_base():
+    # reportlab is imported and the DejaVu TTF registered once per process, inside wow_report_pdf
+    if DEJAVU_PATH: register_dejavu(DEJAVU_PATH)
+    return rl_base()
+
+@lru_cache(maxsize=1)
+def _docx_document():
+    from docx import Document
+    return Document
 
 # ---------------- App directories & branding ----------------
 APP_DIR = Path.home() / '.ayurprakriti_app'
@@ -39,10 +77,8 @@ CFG_PATH = APP_DIR / 'config_rules.yaml'
 REPORTS_DIR = APP_DIR / 'reports'
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
-# try to copy a logo if provided in container path (useful for your environment)
+# logo uploaded on the Config & Export tab is stored here
 logo_path = APP_DIR / "logo.png"
-    except Exception:
-        pass
 
 BRAND = {
     'clinic_name': 'Kakunje Wellness',
@@ -73,7 +109,21 @@ if not logger.handlers:
 logger.setLevel(logging.INFO)
 
 # ---------------- Config / default questions ----------------
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# new hashes: pbkdf2_sha256 (passlib's default 29000 rounds; override with AYUR_PBKDF2_ROUNDS after
+# timing a login on the target host). bcrypt is accepted for verify only, for hashes set by force_admin_bcrypt.py
+PBKDF2_ROUNDS = int(os.environ.get('AYUR_PBKDF2_ROUNDS', 29000))
+
+@st.cache_resource
+def get_pwd_context():
+    # CryptContext setup runs once per process instead of on every rerun; passlib is only imported on
+    # first login / user creation (the admin seed uses a precomputed hash)
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto",
+                        pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS, bcrypt__default_rounds=11)
+
+# pbkdf2_sha256 hash of the seed admin password 'admin123' (29000 rounds, precomputed) so seeding a
+# fresh DB skips the KDF; change it after first login
+DEFAULT_ADMIN_HASH = '$pbkdf2-sha256$29000$4BuDCZezzGAhspD8xgA1wQ$tH1CBLnlUF8PH7jlc8xHDj0H3U8MnZ0lWmZKJOrSl3M'
 DEFAULT_CFG = {
     'meta': {'app_name': 'AyurPrakriti Pro', 'version': '1.0'},
     'questions': {
@@ -109,48 +159,181 @@ DEFAULT_CFG = {
 if not CFG_PATH.exists():
     with open(CFG_PATH,'w', encoding='utf-8') as f:
         yaml.safe_dump(DEFAULT_CFG, f, sort_keys=False)
-with open(CFG_PATH,'r', encoding='utf-8') as f:
-    CONFIG = yaml.safe_load(f)
+
+DOSHAS = ('Vata','Pitta','Kapha')
+
+def dosha_weight_matrix(question_list):
+    return np.array([[q.get('weights', {}).get(d, 0.0) for d in DOSHAS] for q in question_list], dtype=np.float64).reshape(-1, 3)
+
+@st.cache_resource
+def load_config(mtime):
+    # keyed on the file mtime: reruns skip YAML parsing until the file is edited. The prakriti / vikriti
+    # weight matrices are built here too, once per config version
+    with open(CFG_PATH,'r', encoding='utf-8') as f:
+        cfg = yaml.safe_load(f)
+    return cfg, dosha_weight_matrix(cfg['questions']['prakriti']), dosha_weight_matrix(cfg['questions']['vikriti'])
+
+CONFIG, PR_WEIGHTS, VK_WEIGHTS = load_config(CFG_PATH.stat().st_mtime)
 
 # ---------------- Database ----------------
-conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-cur = conn.cursor()
-cur.executescript('''
+# SQL kept as module constants so the connection's statement cache (keyed on exact text) is reused
+SQL_INSERT_PATIENT = 'INSERT INTO patients (name, age, gender, contact, created_at) VALUES (?,?,?,?,?)'
+SQL_INSERT_ASSESSMENT = 'INSERT INTO assessments (patient_id, assessor, data_json, data_zst, created_at) VALUES (?,?,?,?,?)'
+SQL_INSERT_USER = 'INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,?)'
+SQL_SELECT_PATIENTS = 'SELECT * FROM patients ORDER BY created_at DESC'
+SQL_SELECT_PATIENT_CHOICES = 'SELECT id, name, age, gender FROM patients ORDER BY id DESC'
+
+@st.cache_resource
+def get_conn():
+    # one tuned connection per process (not per rerun); autocommit mode, so batch writes open an explicit
+    # BEGIN. Schema + admin seed also run here, once, instead of on every rerun.
+    c = sqlite3.connect(str(DB_PATH), check_same_thread=False, isolation_level=None, cached_statements=256)
+    c.executescript('''
+PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456; PRAGMA cache_size=-65536;
 CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, display_name TEXT, password_hash TEXT, role TEXT DEFAULT 'clinician', created_at TEXT);
 CREATE TABLE IF NOT EXISTS patients (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, age INTEGER, gender TEXT, contact TEXT, created_at TEXT);
-CREATE TABLE IF NOT EXISTS assessments (id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id INTEGER, assessor TEXT, data_json TEXT, created_at TEXT, FOREIGN KEY(patient_id) REFERENCES patients(id));
+CREATE TABLE IF NOT EXISTS assessments (id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id INTEGER, assessor TEXT, data_json TEXT, created_at TEXT, data_zst BLOB, FOREIGN KEY(patient_id) REFERENCES patients(id));
+CREATE INDEX IF NOT EXISTS idx_patients_created ON patients(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_assess_patient_created ON assessments(patient_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_assessments_created ON assessments(created_at DESC);
 ''')
-conn.commit()
-cur.execute('SELECT COUNT(1) FROM users')
-if cur.fetchone()[0] == 0:
-    ph = pwd_context.hash('admin123')
-    cur.execute('INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,?)',
-                ('admin', 'Administrator', ph, 'admin', datetime.now().isoformat()))
-    conn.commit()
+    if 'data_zst' not in {r[1] for r in c.execute('PRAGMA table_info(assessments)')}:
+        c.execute('ALTER TABLE assessments ADD COLUMN data_zst BLOB')  # older DBs; backfill_data_zst.py fills it for old rows
+    if c.execute('SELECT COUNT(1) FROM users').fetchone()[0] == 0:
+        c.execute(SQL_INSERT_USER, ('admin', 'Administrator', DEFAULT_ADMIN_HASH, 'admin', datetime.now().isoformat()))
+    return c
+
+@st.cache_resource
+def _db_write_lock():
+    # get_conn() is shared by every session thread; SQLite allows one open transaction per connection, so
+    # writers take this lock for the whole BEGIN..COMMIT (also keeps last_insert_rowid() our own row)
+    return threading.Lock()
+
+conn = get_conn()
+cur = conn.cursor()
+DB_WRITE_LOCK = _db_write_lock()
+
+@st.cache_data
+def load_patients(sig):
+    # sig = (COUNT(*), MAX(id)) so any insert produces a new key; cleared explicitly on insert too
+    return pd.read_sql_query(SQL_SELECT_PATIENTS, conn)
+
+@st.cache_data
+def load_patient_choices(sig):
+    # New Assessment only needs these columns; the full table stays on the Patients tab
+    return pd.read_sql_query(SQL_SELECT_PATIENT_CHOICES, conn)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_assessments_head():
+    # dashboard table: metadata columns only (no data_json blob), newest 40 by rowid so SQLite walks the PK
+    # backwards with no sort. Built as a typed Arrow table (pyarrow ships with Streamlit), which
+    # st.dataframe sends as-is, skipping pandas and its object->Arrow conversion.
+    import pyarrow as pa
+    rows = conn.execute('SELECT id, patient_id, assessor, created_at FROM assessments ORDER BY id DESC LIMIT 40').fetchall()
+    cols = list(zip(*rows)) or [(), (), (), ()]
+    return pa.table({'id': pa.array(cols[0], pa.int64()), 'patient_id': pa.array(cols[1], pa.int64()),
+                     'assessor': pa.array(cols[2], pa.string()), 'created_at': pa.array(cols[3], pa.string())})
+
+@st.cache_data(show_spinner=False)
+def _load_assessment_json(aid):
+    r = conn.execute('SELECT data_json, data_zst FROM assessments WHERE id=?', (aid,)).fetchone()
+    if r is None: raise KeyError(aid)  # exceptions aren't cached, so an id saved later is still found
+    return _unpack_payload(*r)
+
+def load_assessment_json(aid):
+    # assessments are never updated, so cached payloads stay valid across saves
+    try: return _load_assessment_json(aid)
+    except KeyError: return None
+
+def patients_sig():
+    return tuple(cur.execute('SELECT COUNT(*), COALESCE(MAX(id),0) FROM patients').fetchone())
+
+def save_assessments(items):
+    # items: iterable of (patient_id, assessor, payload_dict, created_at); a single save is a list of one.
+    # Payloads are serialized lazily by the generator, so large imports stream through one executemany in
+    # one transaction (one fsync per batch). Returns the rowid of the last inserted assessment.
+    rows = ((pid, who, *_pack_payload(p), ts) for pid, who, p, ts in items)
+    with DB_WRITE_LOCK, conn:
+        conn.execute('BEGIN')
+        conn.executemany(SQL_INSERT_ASSESSMENT, rows)
+        last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+    load_assessments_head.clear()
+    return last_id
+
+def import_patients_csv(df):
+    # one executemany in one transaction instead of a commit per row; returns rows inserted
+    missing = {'name'} - set(df.columns)
+    if missing: raise ValueError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+    df = df.reindex(columns=['name','age','gender','contact']).dropna(subset=['name'])
+    ages = pd.to_numeric(df['age'], errors='coerce')
+    now = datetime.now().isoformat()
+    txt = lambda v: None if pd.isna(v) else str(v)
+    rows = [(str(n), None if pd.isna(a) else int(a), txt(g), txt(c), now)
+            for n, a, g, c in zip(df['name'], ages, df['gender'], df['contact'])]
+    with DB_WRITE_LOCK, conn:
+        conn.execute('BEGIN')
+        conn.executemany(SQL_INSERT_PATIENT, rows)
+    return len(rows)
 
 # ---------------- Helpers: scoring & recommendations ----------------
-def score_dosha_from_answers(answers, question_list):
-    totals = {'Vata':0.0,'Pitta':0.0,'Kapha':0.0}
-    for q in question_list:
-        qid = q['id']; w = q.get('weights', {}); val = answers.get(qid, 3)
-        for d in totals:
-            totals[d] += w.get(d, 0) * float(val)
-    s = sum(totals.values())
+def score_dosha_from_answers(answers, question_list, W=None):
+    # W: (n_questions, 3) weight matrix; pass the precomputed PR_WEIGHTS / VK_WEIGHTS to skip rebuilding it
+    if W is None: W = dosha_weight_matrix(question_list)
+    vec = np.fromiter((answers.get(q['id'], 3) for q in question_list), dtype=np.float64, count=len(question_list))
+    totals = vec @ W
+    s = totals.sum()
     if s <= 0:
-        return {k: round(100/3,1) for k in totals}
-    return {k: round((v/s)*100,1) for k,v in totals.items()}
+        return {k: round(100/3,1) for k in DOSHAS}
+    return {k: round(float(v),1) for k,v in zip(DOSHAS, totals/s*100)}
 
-def psychometric_tipiscale(answers):
+@st.cache_resource
+def _score_batch_kernel():
+    # optional numba kernel, compiled and warmed once per process so no rerun/click pays the JIT cost
     try:
-        ext = (answers['E1'] + (8 - answers['E6']))/2.0
-        agr = (((8 - answers['A1']) + answers['A6']))/2.0
-        con = (answers['C1'] + (8 - answers['C6']))/2.0
-        emo = (answers['N1'] + (8 - answers['N6']))/2.0
-        ope = (answers['O1'] + (8 - answers['O6']))/2.0
-    except Exception:
-        return {'Extraversion':50,'Agreeableness':50,'Conscientiousness':50,'Emotionality':50,'Openness':50}
-    raw = {'Extraversion': ext, 'Agreeableness': agr, 'Conscientiousness': con, 'Emotionality': emo, 'Openness': ope}
-    return {k: round((v-1)/6*100,1) for k,v in raw.items()}
+        from numba import njit, prange
+    except ImportError:
+        return None
+    @njit(parallel=True, fastmath=True)
+    def _score_batch(answers, W):
+        n, q = answers.shape
+        out = np.empty((n, 3), np.float32)
+        for i in prange(n):
+            t0 = np.float32(0.0); t1 = np.float32(0.0); t2 = np.float32(0.0)
+            for j in range(q):
+                a = np.float32(answers[i, j])
+                t0 += a*W[j, 0]; t1 += a*W[j, 1]; t2 += a*W[j, 2]
+            s = t0 + t1 + t2
+            if s <= 0:
+                out[i, 0] = out[i, 1] = out[i, 2] = np.float32(100/3)
+            else:
+                out[i, 0] = t0/s*100; out[i, 1] = t1/s*100; out[i, 2] = t2/s*100
+        return out
+    _score_batch(np.full((1, 1), 3, np.int8), np.ones((1, 3), np.float32))
+    return _score_batch
+
+def score_dosha_batch(answers, W):
+    # bulk re-scoring: answers is (n_assessments, n_questions) of 1-5 ints, W the matching weight matrix;
+    # returns (n_assessments, 3) percentages in DOSHAS order (numba if installed, else NumPy)
+    A = np.ascontiguousarray(answers, dtype=np.int8); W = np.ascontiguousarray(W, dtype=np.float32)
+    kernel = _score_batch_kernel()
+    if kernel is not None:
+        return kernel(A, W)
+    T = A.astype(np.float32) @ W
+    s = T.sum(axis=1, keepdims=True)
+    return np.where(s > 0, T / np.where(s > 0, s, 1) * 100, np.float32(100/3)).astype(np.float32)
+
+# TIPI item order/sign: reversed items score as (8 - x), i.e. -x + 8; pairs average into one trait
+_TIPI_KEYS = ('E1','E6','A1','A6','C1','C6','N1','N6','O1','O6')
+_TIPI_SIGN = np.array([1,-1,-1,1,1,-1,1,-1,1,-1], dtype=np.float64)
+_TIPI_OFFSET = np.array([0,8,8,0,0,8,0,8,0,8], dtype=np.float64)
+_TIPI_TRAITS = ('Extraversion','Agreeableness','Conscientiousness','Emotionality','Openness')
+
+def psychometric_tipiscale(answers):
+    # unanswered items fall back to the scale midpoint (4), which scores as 50%
+    vec = np.fromiter((answers.get(k, 4) for k in _TIPI_KEYS), np.float64, len(_TIPI_KEYS))
+    raw = (_TIPI_SIGN*vec + _TIPI_OFFSET).reshape(5, 2).mean(1)
+    return {k: round(float(v), 1) for k, v in zip(_TIPI_TRAITS, (raw-1)/6*100)}
 
 def recommend_career(dosha_percent, psycho_pct):
     dom = max(dosha_percent, key=dosha_percent.get)
@@ -194,6 +377,13 @@ def recommend_health(dosha_pct, vikriti_pct):
     return rec
 
 # ---------------- Radar chart ----------------
+@st.cache_resource
+def _radar_canvas():
+    # one Figure/Axes per process, reused across renders and reruns (cleared in between); the lock
+    # serializes access because Streamlit runs sessions on separate threads
+    fig = _mpl_figure()(figsize=(4.2,4.2))
+    return fig, fig.add_subplot(111, polar=True), threading.Lock()
+
 def make_radar_chart(prakriti, vikriti, filename: Path, title='Prakriti vs Vikriti'):
     labels = list(prakriti.keys())
     n = len(labels)
@@ -201,86 +391,47 @@ def make_radar_chart(prakriti, vikriti, filename: Path, title='Prakriti vs Vikri
     vals1 = [prakriti[l] for l in labels]
     vals2 = [vikriti.get(l, 0) for l in labels]
     vals1 += vals1[:1]; vals2 += vals2[:1]; angles += angles[:1]
-    fig = plt.figure(figsize=(4.2,4.2)); ax = fig.add_subplot(111, polar=True)
-    ax.set_theta_offset(np.pi/2); ax.set_theta_direction(-1)
-    ax.plot(angles, vals1, linewidth=2, label='Prakriti'); ax.fill(angles, vals1, alpha=0.25)
-    ax.plot(angles, vals2, linewidth=2, label='Vikriti'); ax.fill(angles, vals2, alpha=0.12)
-    ax.set_thetagrids(np.degrees(angles[:-1]), labels)
-    ax.set_ylim(0,100)
-    ax.set_title(title, pad=10)
-    ax.legend(loc='upper right', bbox_to_anchor=(1.3,1.1))
-    plt.tight_layout(); fig.savefig(filename, dpi=150); plt.close(fig)
+    fig, ax, lock = _radar_canvas()
+    with lock:
+        ax.cla()
+        ax.set_theta_offset(np.pi/2); ax.set_theta_direction(-1)
+        ax.plot(angles, vals1, linewidth=2, label='Prakriti'); ax.fill(angles, vals1, alpha=0.25)
+        ax.plot(angles, vals2, linewidth=2, label='Vikriti'); ax.fill(angles, vals2, alpha=0.12)
+        ax.set_thetagrids(np.degrees(angles[:-1]), labels)
+        ax.set_ylim(0,100)
+        ax.set_title(title, pad=10)
+        ax.legend(loc='upper right', bbox_to_anchor=(1.3,1.1))
+        fig.tight_layout(); fig.savefig(filename, dpi=150, format='png')
+
+@st.cache_data(show_spinner=False)
+def radar_image(prak_items, vik_items) -> bytes:
+    # in-memory preview image; keyed on the (dosha, pct) item tuples in insertion order, which sets the axis order
+    buf = BytesIO()
+    make_radar_chart(dict(prak_items), dict(vik_items), buf)
+    return buf.getvalue()
 
 # ---------------- Fonts (DejaVu) registration if available ----------------
-DEJAVU_PATH = None
-_fonts = list(FONTS_DIR.glob("DejaVuSans*.ttf"))
-if _fonts:
-    DEJAVU_PATH = str(_fonts[0])
-else:
-    for cand in [r"C:\Windows\Fonts\DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/Library/Fonts/DejaVuSans.ttf"]:
-        if os.path.exists(cand):
-            DEJAVU_PATH = cand; break
-if DEJAVU_PATH:
-    try:
-        pdfmetrics.registerFont(TTFont('DejaVuSans', DEJAVU_PATH))
-    except Exception:
-        logger.exception("Font register failed")
-
-# ---------------- "Wow" plain-language / life-changing advice generator ----------------
-def generate_wow_advice(patient, prakriti_pct, vikriti_pct, psych_pct, career_recs, rel_tips, health_recs):
-    dom = max(prakriti_pct, key=prakriti_pct.get)
-    current = max(vikriti_pct, key=vikriti_pct.get)
-    # One-line charismatic insight (hero)
-    hero = (f"{patient.get('name','You')} — creative energy + steady rituals = powerful results. "
-            f"You're primarily {dom}. Right now you may feel {('slow & heavy' if current=='Kapha' else 'scattered & anxious' if current=='Vata' else 'hot & impatient')}.")
-    # 90-day identity+behavior plan (simple steps)
-    plan_lines = [
-        "90-day transformation plan (small daily actions that become identity):",
-        "1) Identity pledge (Day 1): Write one line: 'I am someone who finishes what they start with calm focus.' Put it on your phone wallpaper.",
-        "2) Daily core ritual (0–21 days): Warm water, 5–10 min oil massage or warming shower, 2 focused work blocks (60–90 min).",
-        "3) Weekly mastery (weeks 3–12): Finish one small creative project every 2–3 weeks and share it (blog, social, colleague).",
-        "4) Accountability (start now): Pick one friend/peer to check progress weekly for 12 weeks (2-min message).",
-        "5) Measure progress: Record morning energy (1–5) and sleep times daily for 90 days; review at day 14, 45, 90.",
-        "6) Recalibrate: If sleep/energy don't improve after 14 days, book a short consult — tweak herbs/doses or routines."
-    ]
-    plan = "\n".join(plan_lines)
-    # Life-changing single habit stack (keep very small)
-    habit_stack = [
-        "Life-changing habit stack (do these in order, takes 15–25 minutes total):",
-        "A) Warm water on waking + 2 min breathing (inhale 4s, exhale 6s)",
-        "B) 5–10 min oil self-massage or 10 min full-body stretching",
-        "C) One 60–90 min focused creative/work block (timer on)",
-        "D) Evening: reflect 2 things done, prepare 1 clear task for next day"
-    ]
-    habit_stack_text = "\n".join(habit_stack)
-    # Concrete "wow" tips (actionable, emotionally resonant)
-    wow_tips = [
-        "- If you want more calm: reduce decision load — only 3 choices for morning clothes/breakfast.",
-        "- If you want more creative output: ship one small thing per week and celebrate it.",
-        "- If you want better relationships: do a 3-minute daily gratitude note for a partner or colleague.",
-        "- If you want better health: commit to 21 days of the routine — habits stick around that mark."
-    ]
-    wow_text = "\n".join(wow_tips)
-    # One-page checklist (copyable)
-    checklist = [
-        "ONE-PAGE ACTION CHECKLIST",
-        "- Morning: warm water + 2 min breathing + 5–10 min oil rub/stretch",
-        "- Work: two focused work blocks (60–90 min each). Timer ON.",
-        "- Movement: daily 25–35 min walk or light yoga.",
-        "- Evening: light dinner by 8 pm, reflect on 2 wins.",
-        "- Weekly: publish/share 1 small creative item; 20-min planning on Sunday.",
-        "- Accountability: weekly check-in with your chosen peer for 12 weeks."
-    ]
-    checklist_text = "\n".join(checklist)
-    # Doctor's short signed note (friendly)
-    doctor_note = ("Doctor's note: Start the 'Start Today' items now. "
-                   "Small, consistent steps matter more than big, rare interventions. "
-                   "We'll review your progress at 2 weeks and tune the plan.")
-    return {'hero': hero, 'plan': plan, 'habit_stack': habit_stack_text, 'wow_text': wow_text, 'checklist': checklist_text, 'doctor_note': doctor_note}
+@st.cache_resource
+def find_dejavu():
+    # glob + path probing run once per process; the TTF is registered lazily in _rl_base()
+    path = None
+    _fonts = list(FONTS_DIR.glob("DejaVuSans*.ttf"))
+    if _fonts:
+        path = str(_fonts[0])
+    else:
+        for cand in [r"C:\Windows\Fonts\DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/Library/Fonts/DejaVuSans.ttf"]:
+            if os.path.exists(cand):
+                path = cand; break
+    return path
+
+DEJAVU_PATH = find_dejavu()
 
 # ---------------- One-page action plan PDF ----------------
-def onepage_actionplan_pdf(patient, checklist_text, hero_text):
-    buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
+def onepage_actionplan_pdf(patient, checklist_text, hero_text, out_path=None):
+    # written straight to disk (no in-memory copy of the whole PDF); returns the Path
+    A4, mm, colors, canvas = _rl_base()
+    out_path = Path(out_path) if out_path else TMP_DIR / f'actionplan_{uuid4().hex}.pdf'
+    c = canvas.Canvas(str(out_path), pagesize=A4)
     left = 20*mm; y = A4[1] - 30*mm
     try:
         if DEJAVU_PATH:
@@ -302,194 +453,24 @@ def onepage_actionplan_pdf(patient, checklist_text, hero_text):
         if y < 30*mm:
             c.showPage(); y = A4[1] - 30*mm
     c.setFont('Helvetica', 8); c.drawString(left, 12*mm, f"{BRAND['clinic_name']} — {BRAND['phone']} — {BRAND['email']}")
-    c.save(); buf.seek(0); return buf
+    c.save(); return out_path
 
 # ---------------- Simple fallback wrapper for text ----------------
 def _wrap_text_simple(text, chars_per_line=95):
-    words = str(text).split(); lines=[]; cur=""
-    for w in words:
-        if len(cur)+len(w)+1 <= chars_per_line: cur = cur + (" " if cur else "") + w
-        else: lines.append(cur); cur=w
-    if cur: lines.append(cur)
-    return lines
-
-# ---------------- Branded PDF with Cover, Radar, Priority strip ----------------
+    return textwrap.wrap(str(text), width=chars_per_line, break_long_words=False) or ['']
+
+# ---------------- Branded PDF (rendered by wow_report_pdf) ----------------
 def branded_pdf_report(patient, prakriti_pct, vikriti_pct, psych_pct, career_recs, rel_tips, health_recs,
-                       include_appendix=False, report_id=None, wconf=None, wow=None):
-    if wconf is None: wconf = WCONF
-    try:
-        radar_path = TMP_DIR / f"radar_{int(datetime.now().timestamp())}.png"
-        make_radar_chart(prakriti_pct, vikriti_pct, radar_path, title='Prakriti vs Vikriti')
-    except Exception:
-        radar_path = None
-    try:
-        buf = BytesIO()
-        doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=18*mm, rightMargin=18*mm, topMargin=18*mm, bottomMargin=18*mm)
-        styles = getSampleStyleSheet()
-        base_font = 'DejaVuSans' if DEJAVU_PATH else 'Helvetica'
-        accent = colors.HexColor(BRAND.get('accent_color','#0F7A61'))
-        styles.add(ParagraphStyle(name='Hero', fontName=base_font, fontSize=20, leading=24, alignment=1, spaceAfter=6))
-        styles.add(ParagraphStyle(name='HeroSub', fontName=base_font, fontSize=11, leading=13, alignment=1, textColor=colors.darkgrey))
-        styles.add(ParagraphStyle(name='Section', fontName=base_font, fontSize=12, leading=14, textColor=accent))
-        styles.add(ParagraphStyle(name='Body', fontName=base_font, fontSize=10, leading=12))
-        flow = []
-        # Cover / Hero page
-        flow.append(Spacer(1,6))
-        # big name
-        flow.append(Paragraph(patient.get('name','Patient Name'), styles['Hero']))
-        if wow and wow.get('hero'):
-            flow.append(Paragraph(wow['hero'], styles['HeroSub']))
-        flow.append(Spacer(1,6))
-        # badges row (Dominant / Current / Top career)
-        badges = [
-            Paragraph(f"<b>Dominant</b><br/>{max(prakriti_pct,key=prakriti_pct.get)}", styles['Body']),
-            Paragraph(f"<b>Current</b><br/>{max(vikriti_pct,key=vikriti_pct.get)}", styles['Body']),
-            Paragraph(f"<b>Top career</b><br/>{career_recs[0]['role'] if career_recs else '-'}", styles['Body'])
-        ]
-        table = Table([[badges[0], badges[1], badges[2]]], colWidths=[60*mm,60*mm,60*mm])
-        table.setStyle(TableStyle([('BACKGROUND',(0,0),(-1,0),colors.whitesmoke),('VALIGN',(0,0),(-1,-1),'MIDDLE'),('ALIGN',(0,0),(-1,-1),'CENTER')]))
-        flow.append(table)
-        flow.append(Spacer(1,8))
-        # radar chart on cover if available
-        if radar_path and radar_path.exists():
-            try:
-                img = RLImage(str(radar_path), width=120*mm, height=120*mm)
-                flow.append(img)
-            except Exception:
-                pass
-        flow.append(Spacer(1,8))
-        # Doctor note + signature (if available)
-        doc_note = wow.get('doctor_note') if wow else ''
-        if doc_note:
-            flow.append(Paragraph(f"<i>{doc_note}</i>", styles['Body']))
-            sig_path = APP_DIR / 'signature.png'
-            if sig_path.exists():
-                try:
-                    sig_img = scaled_rl_image(sig_path, max_w_mm=40, max_h_mm=20)
-                    flow.append(sig_img)
-                except Exception:
-                    pass
-        flow.append(PageBreak())
-
-        # Main content - summary, charts, tables
-        flow.append(Paragraph("Executive summary", styles['Section']))
-        flow.append(Paragraph("Below are clear findings and prioritized actions to start today.", styles['Body']))
-        flow.append(Spacer(1,6))
-        # charts area (radar + bar charts)
-        if radar_path and radar_path.exists():
-            try:
-                img = RLImage(str(radar_path), width=120*mm, height=120*mm)
-                flow.append(img); flow.append(Spacer(1,6))
-            except Exception:
-                pass
-
-        # Priority action strip (Start today / This week / This month)
-        priority = [
-            ("Start today", "Warm water on waking; 5–10 min warm oil rub or stretch; one focused 60–90 min block"),
-            ("This week", "Add a second focused block; daily 20–35 min walk; start a small micro-project"),
-            ("This month", "Finish + share one creative project; set a weekly accountability check-in")
-        ]
-        cols_row = []
-        for title, text in priority:
-            p = Paragraph(f"<b>{title}</b><br/>{text}", styles['Body'])
-            cols_row.append(p)
-        strip = Table([cols_row], colWidths=[60*mm,60*mm,60*mm])
-        strip.setStyle(TableStyle([
-            ('BACKGROUND',(0,0),(-1,-1),colors.Color(0.96,0.98,0.95)),
-            ('BOX',(0,0),(-1,-1),0.5,colors.lightgrey),
-            ('VALIGN',(0,0),(-1,-1),'TOP'),
-            ('ALIGN',(0,0),(-1,-1),'CENTER'),
-            ('LEFTPADDING',(0,0),(-1,-1),6), ('RIGHTPADDING',(0,0),(-1,-1),6)
-        ]))
-        flow.append(strip); flow.append(Spacer(1,8))
-
-        # Recommendations: Career / Relationship / Health short blocks
-        flow.append(Paragraph("Top recommendations (short)", styles['Section']))
-        flow.append(Paragraph("Career: " + (career_recs[0]['role'] if career_recs else '—'), styles['Body']))
-        flow.append(Paragraph("Relationship: " + (rel_tips[0][1] if rel_tips else '—'), styles['Body']))
-        flow.append(Paragraph("Health: " + (', '.join(health_recs.get('diet',[])) if health_recs else '—'), styles['Body']))
-        flow.append(Spacer(1,8))
-
-        # Include long plain-language/wow plan as appendix if requested
-        if include_appendix and wow:
-            flow.append(PageBreak())
-            flow.append(Paragraph("APPENDIX — Transformation Plan", styles['Section']))
-            flow.append(Spacer(1,6))
-            flow.append(Paragraph("<b>90-day transformation (practical)</b>", styles['Body']))
-            for line in wow['plan'].split('\n'):
-                flow.append(Paragraph(line, styles['Body']))
-            flow.append(Spacer(1,6))
-            flow.append(Paragraph("<b>Habit stack (daily)</b>", styles['Body']))
-            for line in wow['habit_stack'].split('\n'):
-                flow.append(Paragraph(line, styles['Body']))
-            flow.append(Spacer(1,6))
-            flow.append(Paragraph("<b>Concrete wow tips</b>", styles['Body']))
-            for line in wow['wow_text'].split('\n'):
-                flow.append(Paragraph(line, styles['Body']))
-            flow.append(Spacer(1,6))
-            flow.append(Paragraph("<b>One-page checklist</b>", styles['Body']))
-            for line in wow['checklist'].split('\n'):
-                flow.append(Paragraph(line, styles['Body']))
-
-        # footer contact block
-        flow.append(PageBreak())
-        flow.append(Paragraph(f"{BRAND['clinic_name']} — {BRAND['doctor']} — {BRAND['phone']} — {BRAND['email']}", styles['Body']))
-
-        # page watermark & footer
-        def _draw_footer_and_watermark(canvas_obj, doc_obj):
-            try:
-                canvas_obj.saveState()
-                W,H = A4
-                try:
-                    canvas_obj.setFont('DejaVuSans', 40) if DEJAVU_PATH else canvas_obj.setFont('Helvetica-Bold', 40)
-                except Exception:
-                    canvas_obj.setFont('Helvetica-Bold', 40)
-                opacity = float(wconf.get('watermark_opacity', 0.06))
-                try:
-                    canvas_obj.setFillAlpha(opacity)
-                except Exception:
-                    canvas_obj.setFillColorRGB(0.7,0.7,0.7)
-                canvas_obj.translate(W/2.0, H/2.0); canvas_obj.rotate(30)
-                canvas_obj.drawCentredString(0, 0, wconf.get('watermark_text', BRAND['clinic_name']))
-                canvas_obj.restoreState()
-            except Exception:
-                logger.exception("watermark failed")
-            try:
-                canvas_obj.saveState()
-                footer_y = 15*mm
-                canvas_obj.setStrokeColor(colors.lightgrey); canvas_obj.setLineWidth(0.5)
-                canvas_obj.line(18*mm, footer_y + 8, (A4[0]-18*mm), footer_y + 8)
-                logo_path_local = APP_DIR / 'logo.png'
-                x = 20*mm
-                if wconf.get('show_footer_logo', True) and logo_path_local.exists():
-                    try:
-                        reader = ImageReader(str(logo_path_local)); iw, ih = reader.getSize(); target_h = 10*mm; scale = target_h/ih
-                        canvas_obj.drawImage(str(logo_path_local), x, footer_y - 2, width=iw*scale, height=ih*scale, mask='auto'); x += (iw*scale) + 4
-                    except Exception:
-                        pass
-                canvas_obj.setFont('Helvetica', 8)
-                canvas_obj.drawString(x, footer_y, f"{BRAND['clinic_name']} — {BRAND['phone']} — {BRAND['email']}")
-                page_num = canvas_obj.getPageNumber()
-                canvas_obj.drawRightString(A4[0] - 18*mm, footer_y, wconf.get('page_number_format','Page {page}').format(page=page_num))
-                canvas_obj.restoreState()
-            except Exception:
-                logger.exception("footer failed")
-        doc.build(flow, onFirstPage=_draw_footer_and_watermark, onLaterPages=_draw_footer_and_watermark)
-        buf.seek(0)
-        if radar_path and radar_path.exists():
-            try: radar_path.unlink()
-            except: pass
-        return buf
-    except Exception as e:
-        logger.exception("Branded PDF failed: %s", e)
-        # fallback simple canvas
-        buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
-        c.drawString(50,800, f"{BRAND['clinic_name']} - Simple fallback report")
-        c.save(); buf.seek(0); return buf
+                       include_appendix=False, report_id=None, wconf=None, wow=None, out_path=None):
+    # fills in the app's BRAND / WCONF / font and the logo + signature kept in APP_DIR; returns the Path
+    return _render_branded_pdf(patient, prakriti_pct, vikriti_pct, psych_pct, career_recs, rel_tips, health_recs,
+                               out_path or TMP_DIR / f'report_{uuid4().hex}.pdf', BRAND, WCONF if wconf is None else wconf,
+                               include_appendix=include_appendix, report_id=report_id, wow=wow,
+                               font_path=DEJAVU_PATH, assets_dir=APP_DIR)
 
 # ---------------- Docx ----------------
 def docx_report(patient, prakriti_pct, vikriti_pct, psych_pct, career_recs, rel_tips, health_recs, wow):
-    doc = Document()
+    doc = _docx_document()()
     doc.add_heading(f"{BRAND['clinic_name']} — Personalized Report", level=1)
     doc.add_paragraph(f"Name: {patient.get('name')}    Age: {patient.get('age')}    Gender: {patient.get('gender')}")
     doc.add_paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
@@ -497,7 +478,58 @@ def docx_report(patient, prakriti_pct, vikriti_pct, psych_pct, career_recs, rel_
     doc.add_paragraph(wow.get('hero',''))
     doc.add_heading('90-day plan', level=2)
     for line in wow.get('plan','').split('\n'): doc.add_paragraph(line)
-    bio = BytesIO(); doc.save(bio); bio.seek(0); return bio
+    bio = BytesIO(); doc.save(bio); return bio.getvalue()  # bytes: st.download_button takes them as-is
+
+# ---------------- Cached report builders (keyed on assessment id + settings) ----------------
+# Every widget click reruns the script; these keep the saved assessment's PDF/DOCX from being rebuilt each time.
+# _payload is that assessment's data (same aid => same content), so it is passed unhashed.
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_branded_pdf(aid, include_appendix, wconf_json, wow_json, _payload):
+    # bytes, like cached_actionplan_pdf: the temp file is removed once read, so nothing piles up in TMP_DIR
+    p = _payload
+    path = branded_pdf_report(p['patient'], p['prakriti_pct'], p['vikriti_pct'], p['psych_pct'], p['career_recs'],
+                              p['relationship_tips'], p['health_recs'], include_appendix=include_appendix, report_id=aid,
+                              wconf=json.loads(wconf_json), wow=json.loads(wow_json))
+    data = path.read_bytes(); path.unlink(missing_ok=True)
+    return data
+
+@st.cache_data(show_spinner=False, max_entries=32, persist='disk')
+def cached_actionplan_pdf(aid, checklist_text, hero_text, _patient):
+    # bytes (not a path) so the disk-persisted entry stays valid across restarts and tmp cleanups
+    path = onepage_actionplan_pdf(_patient, checklist_text, hero_text, out_path=TMP_DIR / f'actionplan_{aid}.pdf')
+    data = path.read_bytes(); path.unlink(missing_ok=True)
+    return data
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_docx_report(aid, wow_json, _payload):
+    p = _payload
+    return docx_report(p['patient'], p['prakriti_pct'], p['vikriti_pct'], p['psych_pct'], p['career_recs'],
+                       p['relationship_tips'], p['health_recs'], json.loads(wow_json))
+
+# ---------------- Bulk export (one worker process per report) ----------------
+SQL_LATEST_ASSESSMENTS = ('SELECT a.patient_id, a.data_json, a.data_zst FROM assessments a '
+                          'JOIN (SELECT MAX(id) AS id FROM assessments GROUP BY patient_id) l ON l.id = a.id')
+
+def bulk_export(patient_ids=None):
+    # rendered by `python wow_report_pdf.py`, which fans out to a spawn process pool. Not a pool from here:
+    # fork from the multithreaded server can copy a lock another thread holds, and spawn re-imports
+    # __main__, which under Streamlit is this script. Jobs carry everything a report needs (no Streamlit
+    # caches in the workers); if the helper fails, render sequentially in-process
+    rows = conn.execute(SQL_LATEST_ASSESSMENTS).fetchall()
+    if patient_ids is not None:
+        keep = set(map(int, patient_ids)); rows = [r for r in rows if r[0] in keep]
+    jobs = [(_unpack_payload(data_json, data_zst), str(REPORTS_DIR / f'{pid}.pdf'), BRAND, dict(WCONF), DEJAVU_PATH, str(APP_DIR))
+            for pid, data_json, data_zst in rows]
+    if len(jobs) > 1:
+        try:
+            out = subprocess.run([sys.executable, str(Path(__file__).with_name('wow_report_pdf.py'))],
+                                 input=_dumps(jobs).encode('utf-8'), capture_output=True, check=True)
+            return json.loads(out.stdout)
+        except subprocess.CalledProcessError as e:
+            logger.error("parallel export failed; rendering sequentially:\n%s", e.stderr.decode('utf-8', 'replace'))
+        except Exception:
+            logger.exception("parallel export failed; rendering sequentially")
+    return [render_bulk_report(j) for j in jobs]
 
 # ---------------- Streamlit UI ----------------
 st.set_page_config(page_title="AyurPrakriti Pro — Wow Reports", layout='wide')
@@ -516,7 +548,7 @@ if 'auth' not in st.session_state: st.session_state.auth = False
 if st.sidebar.button('Login'):
     cur.execute('SELECT password_hash, display_name, role FROM users WHERE username=?', (username,))
     r = cur.fetchone()
-    if r and pwd_context.verify(password, r[0]):
+    if r and get_pwd_context().verify(password, r[0]):
         st.session_state.auth = True; st.session_state.user = username; st.session_state.user_info = {'display_name': r[1], 'role': r[2]}
         st.sidebar.success(f"Welcome {r[1]}")
     else:
@@ -536,19 +568,29 @@ with tabs[0]:
             if st.form_submit_button('Create'):
                 if not name: st.warning('Name required')
                 else:
-                    cur.execute('INSERT INTO patients (name, age, gender, contact, created_at) VALUES (?,?,?,?,?)',
-                                (name, age, gender, contact, datetime.now().isoformat())); conn.commit()
+                    with DB_WRITE_LOCK, conn: conn.execute(SQL_INSERT_PATIENT, (name, age, gender, contact, datetime.now().isoformat()))
+                    load_patients.clear(); load_patient_choices.clear()
                     st.success('Patient created')
-    patients_df = pd.read_sql_query('SELECT * FROM patients ORDER BY created_at DESC', conn)
+    with st.expander('Import patients from CSV'):
+        st.caption('Columns: name (required), age, gender, contact')
+        up = st.file_uploader('Patients CSV', type=['csv'], key='patients_csv')
+        if up is not None and st.button('Import'):
+            try:
+                n = import_patients_csv(pd.read_csv(up))
+                load_patients.clear(); load_patient_choices.clear()
+                st.success(f'Imported {n} patients')
+            except Exception as e:
+                st.error(f'Import failed: {e}')
+    patients_df = load_patients(patients_sig())
     st.dataframe(patients_df)
 
 # New Assessment
 with tabs[1]:
     st.header('New Assessment — Prakriti / Vikriti / Psychometrics')
-    patients = pd.read_sql_query('SELECT * FROM patients ORDER BY created_at DESC', conn)
+    patients = load_patient_choices(patients_sig())
     if patients.empty:
         st.info('Create a patient first'); st.stop()
-    psel = st.selectbox('Select patient', options=patients['id'].tolist(), format_func=lambda x: f"{int(x)} - {patients.loc[patients['id']==x,'name'].values[0]}")
+    psel = st.selectbox('Select patient', options=patients['id'].tolist(), format_func=lambda x: f"{int(x)} - {patients.loc[patients['id']==x,'name'].iat[0]}")
     patient_row = patients[patients['id']==psel].iloc[0].to_dict()
     st.markdown(f"**Patient:** {patient_row['name']} — Age {patient_row['age']} — {patient_row['gender']}")
     st.markdown('---')
@@ -566,22 +608,25 @@ with tabs[1]:
     for i,q in enumerate(psy_qs):
         with cols[i%2]: psy_answers[q['id']] = st.slider(q['text'],1,7,4,key=f"psy_{q['id']}")
     if st.button('Compute & Save'):
-        prak_pct = score_dosha_from_answers(pr_answers, pr_qs)
-        vik_pct = score_dosha_from_answers(vk_answers, vk_qs)
+        prak_pct = score_dosha_from_answers(pr_answers, pr_qs, PR_WEIGHTS)
+        vik_pct = score_dosha_from_answers(vk_answers, vk_qs, VK_WEIGHTS)
         psych_pct = psychometric_tipiscale(psy_answers)
         career = recommend_career(prak_pct, psych_pct)
         rel = recommend_relationship(prak_pct, psych_pct)
         health = recommend_health(prak_pct, vik_pct)
         payload = {'patient': patient_row, 'prakriti_pct': prak_pct, 'vikriti_pct': vik_pct, 'psych_pct': psych_pct,
                    'career_recs': career, 'relationship_tips': rel, 'health_recs': health, 'created_at': datetime.now().isoformat()}
-        aid = cur.execute('INSERT INTO assessments (patient_id, assessor, data_json, created_at) VALUES (?,?,?,?)',
-                          (patient_row['id'], st.session_state.user, json.dumps(payload, ensure_ascii=False), datetime.now().isoformat()))
-        conn.commit()
+        aid = save_assessments([(patient_row['id'], st.session_state.user, payload, datetime.now().isoformat())])
+        # exactly what went to the DB (before the display-only keys below); the dashboard serves it for last_aid
+        st.session_state['last_saved'] = dict(payload)
         # wow advice
         wow = generate_wow_advice(patient_row, prak_pct, vik_pct, psych_pct, career, rel, health)
         payload['wow'] = wow
+        # summary labels computed once here, not on every rerun that redraws the badges/metrics
+        payload['dominant'] = max(prak_pct, key=prak_pct.get); payload['current'] = max(vik_pct, key=vik_pct.get)
+        payload['top_career'] = career[0]['role'] if career else '-'
         st.session_state['last_assessment'] = payload
-        st.session_state['last_aid'] = cur.lastrowid
+        st.session_state['last_aid'] = aid
         st.success('Assessment saved')
 
     if 'last_assessment' in st.session_state:
@@ -590,25 +635,21 @@ with tabs[1]:
         career = payload['career_recs']; rel = payload['relationship_tips']; health = payload['health_recs']; wow = payload.get('wow', {})
         # badges UI
         b1,b2,b3 = st.columns(3)
-        b1.markdown(f"<div style='background:#e8f7ee;padding:12px;border-radius:8px'><h3 style='margin:0'>{max(prak_pct,key=prak_pct.get)}</h3><small>Dominant</small></div>", unsafe_allow_html=True)
-        b2.markdown(f"<div style='background:#fff4e5;padding:12px;border-radius:8px'><h3 style='margin:0'>{max(vik_pct,key=vik_pct.get)}</h3><small>Current</small></div>", unsafe_allow_html=True)
-        b3.markdown(f"<div style='background:#eef6ff;padding:12px;border-radius:8px'><h3 style='margin:0'>{career[0]['role'] if career else '-'}</h3><small>Top career match</small></div>", unsafe_allow_html=True)
+        b1.markdown(f"<div style='background:#e8f7ee;padding:12px;border-radius:8px'><h3 style='margin:0'>{payload['dominant']}</h3><small>Dominant</small></div>", unsafe_allow_html=True)
+        b2.markdown(f"<div style='background:#fff4e5;padding:12px;border-radius:8px'><h3 style='margin:0'>{payload['current']}</h3><small>Current</small></div>", unsafe_allow_html=True)
+        b3.markdown(f"<div style='background:#eef6ff;padding:12px;border-radius:8px'><h3 style='margin:0'>{payload['top_career']}</h3><small>Top career match</small></div>", unsafe_allow_html=True)
         st.markdown('---')
         st.write('### Quick snapshot') 
         c1,c2,c3 = st.columns(3)
-        c1.metric('Dominant', max(prak_pct, key=prak_pct.get))
-        c2.metric('Current', max(vik_pct, key=vik_pct.get))
-        c3.metric('Top career', career[0]['role'] if career else '-')
+        c1.metric('Dominant', payload['dominant'])
+        c2.metric('Current', payload['current'])
+        c3.metric('Top career', payload['top_career'])
         st.write('### Visuals')
         # show radar chart inline
-        radar_local = TMP_DIR / 'preview_radar.png'
         try:
-            make_radar_chart(prak_pct, vik_pct, radar_local)
-            st.image(str(radar_local), use_column_width=False, width=360)
-            try: radar_local.unlink()
-            except: pass
+            st.image(radar_image(tuple(prak_pct.items()), tuple(vik_pct.items())), width=360)
         except Exception:
-            pass
+            logger.exception("radar preview failed")
         st.write('### Start today (priority)')
         st.markdown("""
         <div style='display:flex;gap:10px'>
@@ -633,34 +674,42 @@ with tabs[1]:
         st.markdown('---')
 
         include_appendix = st.checkbox('Include full transformation appendix in PDF', value=True)
+        aid = int(st.session_state.get('last_aid') or 0); wow_json = json.dumps(wow, sort_keys=True)
         if st.button('Prepare Branded PDF (wow report)'):
-            pdf_b = branded_pdf_report(payload['patient'], prak_pct, vik_pct, psych_pct, career, rel, health,
-                                      include_appendix=include_appendix, report_id=st.session_state.get('last_aid'), wconf=WCONF, wow=wow)
-            st.session_state['last_pdf'] = pdf_b.getvalue()
+            pdf_args = (aid, include_appendix, json.dumps(WCONF, sort_keys=True), wow_json, payload)
+            # the three formats are independent: render them side by side (zlib/image encoding release the GIL)
+            # and fill the caches the download buttons below read from. Each builder makes its own canvas/doc.
+            with ThreadPoolExecutor(max_workers=3) as ex:
+                futs = [ex.submit(cached_branded_pdf, *pdf_args),
+                        ex.submit(cached_actionplan_pdf, aid, wow.get('checklist',''), wow.get('hero',''), payload['patient']),
+                        ex.submit(cached_docx_report, aid, wow_json, payload)]
+                pdf_bytes, _, _ = [f.result() for f in futs]
+            st.session_state['last_pdf'] = pdf_bytes
             st.success('PDF prepared — download below'); st.balloons()
         if 'last_pdf' in st.session_state:
-            st.download_button('Download wow Branded PDF', data=BytesIO(st.session_state['last_pdf']),
-                               file_name=f"WowReport_{patient_row['name']}_{st.session_state.get('last_aid',0)}.pdf", mime='application/pdf')
+            st.download_button('Download wow Branded PDF', data=st.session_state['last_pdf'],
+                               file_name=f"WowReport_{patient_row['name']}_{aid}.pdf", mime='application/pdf')
         # 1-page action plan
-        action_pdf = onepage_actionplan_pdf(payload['patient'], wow.get('checklist',''), wow.get('hero',''))
+        action_pdf = cached_actionplan_pdf(aid, wow.get('checklist',''), wow.get('hero',''), payload['patient'])
         st.download_button('Download 1-page Action Plan (PDF)', action_pdf, file_name=f"ActionPlan_{patient_row['name']}.pdf", mime='application/pdf')
         # docx
-        docx_b = docx_report(payload['patient'], prak_pct, vik_pct, psych_pct, career, rel, health, wow)
+        docx_b = cached_docx_report(aid, wow_json, payload)
         st.download_button('Download DOCX report', docx_b, file_name=f"Report_{patient_row['name']}.docx",
                            mime='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
 
 # Dashboard
 with tabs[2]:
     st.header('Clinician Dashboard')
-    df = pd.read_sql_query('SELECT * FROM assessments ORDER BY created_at DESC', conn)
-    if df.empty: st.info('No assessments yet')
+    # cheap EXISTS probe first, so an empty DB never builds/caches the table
+    if not conn.execute('SELECT EXISTS(SELECT 1 FROM assessments)').fetchone()[0]: st.info('No assessments yet')
     else:
-        st.dataframe(df[['id','patient_id','assessor','created_at']].head(40))
+        st.dataframe(load_assessments_head())
         sel = st.number_input('Open assessment id', min_value=0, value=0, step=1)
         if sel > 0:
-            cur.execute('SELECT data_json FROM assessments WHERE id=?', (int(sel),))
-            r = cur.fetchone()
-            if r: st.json(json.loads(r[0])); else: st.warning('Not found')
+            # the assessment just saved in this session is already in memory: skip the DB read + parse
+            data = st.session_state['last_saved'] if int(sel) == st.session_state.get('last_aid') else load_assessment_json(int(sel))
+            if data is not None: st.json(data)
+            else: st.warning('Not found')
     st.markdown('---')
     if st.session_state.user_info.get('role') == 'admin':
         with st.form('create_user'):
@@ -669,10 +718,10 @@ with tabs[2]:
             if st.form_submit_button('Create user'):
                 if not un or not pw: st.warning('Provide username & password')
                 else:
-                    ph = pwd_context.hash(pw)
+                    ph = get_pwd_context().hash(pw)
                     try:
-                        cur.execute('INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,?)',
-                                    (un, dn, ph, role, datetime.now().isoformat())); conn.commit(); st.success('User created')
+                        with DB_WRITE_LOCK, conn: conn.execute(SQL_INSERT_USER, (un, dn, ph, role, datetime.now().isoformat()))
+                        st.success('User created')
                     except Exception as e: st.error(str(e))
 
 # Config & Export
@@ -680,9 +729,22 @@ with tabs[3]:
     st.header('Config & Export')
     st.subheader('Upload logo (appears in footer & cover)')
     logo_file = st.file_uploader('Logo PNG/JPG', type=['png','jpg','jpeg'])
-    if logo_file:
+    # the uploader keeps its file across reruns; only write it once per upload
+    if logo_file and st.session_state.get('logo_saved') != (logo_file.name, logo_file.size):
         s = APP_DIR / 'logo.png'
-        with open(s,'wb') as f: f.write(logo_file.getbuffer())
+        try:
+            # cap at 1024px so every PDF footer doesn't embed a multi-MB image
+            from PIL import Image
+            im = Image.open(logo_file); im.thumbnail((1024,1024), Image.LANCZOS)
+            if im.mode not in ('RGB','RGBA'):  # e.g. CMYK JPEG, which PNG can't hold
+                im = im.convert('RGBA' if im.mode in ('P','PA','LA') else 'RGB')
+            with open(s,'wb') as f: im.save(f, 'PNG', optimize=True)
+        except (ImportError, OSError, ValueError) as e:
+            # no Pillow, or an image it can't read/convert: store the upload as-is
+            if not isinstance(e, ImportError): st.warning(f'Logo could not be resized ({type(e).__name__}); saved as uploaded')
+            logo_file.seek(0)
+            with open(s,'wb') as f: shutil.copyfileobj(logo_file, f, length=1<<20)
+        st.session_state['logo_saved'] = (logo_file.name, logo_file.size)
         st.success('Logo saved')
     st.subheader('PDF settings')
     wm = st.text_input('Watermark text', value=WCONF.get('watermark_text',BRAND['clinic_name']))
@@ -691,6 +753,12 @@ with tabs[3]:
     if st.button('Save PDF settings'):
         WCONF['watermark_text'] = wm; WCONF['watermark_opacity'] = float(wm_op); WCONF['show_footer_logo'] = bool(show_logo)
         st.session_state['pdf_wconf'] = WCONF.copy(); st.success('Settings saved')
+    st.subheader('Bulk export')
+    st.caption(f"Branded PDF of each patient's latest assessment, written to {REPORTS_DIR}")
+    if st.button('Export all reports'):
+        with st.spinner('Generating reports...'):
+            paths = bulk_export()
+        st.success(f'Exported {len(paths)} reports')
 
 st.write('---')
 st.caption('Designed for Kakunje Wellness — personalized, actionable Ayurveda reports.')
@@ -0,0 +1,43 @@
+# admin_db.py
+# Shared SQLite helpers for the admin maintenance scripts (reset_admin*.py, force_admin_*.py).
+import os
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_DB = Path.home() / ".ayurprakriti_app" / "ayurprakriti.db"
+
+UPSERT_USER_SQL = (
+    "INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,?) "
+    "ON CONFLICT(username) DO UPDATE SET {updates}"
+)
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    # one CryptContext per process, configured like the app (pbkdf2_sha256, rounds from AYUR_PBKDF2_ROUNDS)
+    from passlib.context import CryptContext
+    rounds = int(os.environ.get("AYUR_PBKDF2_ROUNDS", 29000))
+    return CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto",
+                        pbkdf2_sha256__default_rounds=rounds, bcrypt__default_rounds=11)
+
+
+def connect(db_path=DEFAULT_DB):
+    # same pragmas as the app's get_conn(), set once per connection
+    # IMMEDIATE: implicit transactions take the write lock up front instead of upgrading mid-way
+    conn = sqlite3.connect(str(db_path), isolation_level="IMMEDIATE")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
+
+def bulk_upsert_users(conn, rows, update=("password_hash",)):
+    # rows: iterable of (username, display_name, password_hash, role, created_at)
+    # inserts new users and, for existing usernames, overwrites only the columns in `update`;
+    # one executemany in one transaction -> one commit for the whole batch
+    sql = UPSERT_USER_SQL.format(updates=", ".join(f"{c}=excluded.{c}" for c in update))
+    with conn:
+        conn.executemany(sql, rows)
@@ -0,0 +1,57 @@
+# backfill_data_zst.py
+# One-shot: add the zstd copy (assessments.data_zst) to rows saved before it existed, and restore
+# assessments.data_json on rows where an earlier version of this script / the app left only data_zst.
+# data_json is never cleared: the other apps sharing this DB only read data_json.
+# Run once after upgrading, with zstandard installed:
+#    python backfill_data_zst.py
+import sys
+import zstandard as zstd
+from admin_db import connect, DEFAULT_DB
+
+BATCH = 5000
+
+if not DEFAULT_DB.exists():
+    print("DB not found:", DEFAULT_DB)
+    sys.exit(1)
+
+conn = connect(DEFAULT_DB)
+cols = {r[1] for r in conn.execute("PRAGMA table_info(assessments)")}
+if "data_zst" not in cols:
+    with conn:
+        conn.execute("ALTER TABLE assessments ADD COLUMN data_zst BLOB")
+
+
+def run(select_sql, update_sql, convert, label):
+    # keyset pagination on id; each batch is one executemany in one transaction
+    total = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(select_sql + " AND id > ? ORDER BY id LIMIT ?", (last_id, BATCH)).fetchall()
+        if not rows:
+            break
+        with conn:
+            conn.executemany(update_sql, ((convert(v), aid) for aid, v in rows))
+        last_id = rows[-1][0]
+        total += len(rows)
+        print(label, total, "assessments ...")
+    return total
+
+
+dctx = zstd.ZstdDecompressor()
+restored = run(
+    "SELECT id, data_zst FROM assessments WHERE data_json IS NULL AND data_zst IS NOT NULL",
+    "UPDATE assessments SET data_json = ? WHERE id = ?",
+    lambda blob: dctx.decompress(blob).decode("utf-8"),
+    "Restored data_json for",
+)
+
+cctx = zstd.ZstdCompressor(level=3)
+compressed = run(
+    "SELECT id, data_json FROM assessments WHERE data_zst IS NULL AND data_json IS NOT NULL",
+    "UPDATE assessments SET data_zst = ? WHERE id = ?",
+    lambda js: cctx.compress(js.encode("utf-8")),
+    "Compressed",
+)
+
+conn.close()
+print("Done.", restored, "data_json restored,", compressed, "assessments compressed.")
@@ -1,38 +1,44 @@
 # check_admin.py
-import sqlite3, pathlib, json, sys
-from passlib.context import CryptContext
-
-DB = pathlib.Path.home() / ".ayurprakriti_app" / "ayurprakriti.db"
-print("DB path:", DB)
-
-# show file exists and size
-try:
-    stat = DB.stat()
-    print("DB exists, size (bytes):", stat.st_size)
-except Exception as e:
-    print("DB file not found or unreadable:", e)
-    sys.exit(1)
-
-conn = sqlite3.connect(str(DB))
-cur = conn.cursor()
-cur.execute("SELECT id, username, password_hash, role FROM users WHERE username='admin'")
-row = cur.fetchone()
-if not row:
-    print("No admin user found (row is None).")
+import pathlib, sqlite3, sys
+
+
+def check_admin(conn, ctx, plaintext="admin123"):
+    # -> (password matches, passlib scheme name); reuse one open conn + one CryptContext across calls
+    row = conn.execute("SELECT password_hash FROM users WHERE username='admin'").fetchone()
+    if not row:
+        return False, ""
+    return ctx.verify(plaintext, row[0]), ctx.identify(row[0]) or ""
+
+
+if __name__ == "__main__":
+    from passlib.context import CryptContext
+
+    DB = pathlib.Path.home() / ".ayurprakriti_app" / "ayurprakriti.db"
+    print("DB path:", DB)
+
+    # show file exists and size
+    try:
+        stat = DB.stat()
+        print("DB exists, size (bytes):", stat.st_size)
+    except Exception as e:
+        print("DB file not found or unreadable:", e)
+        sys.exit(1)
+
+    # read-only: no journal-mode switch or write pragmas just to run a check
+    conn = sqlite3.connect(DB.as_uri() + "?mode=ro", uri=True)
+    row = conn.execute("SELECT id, username, role FROM users WHERE username='admin'").fetchone()
+    if not row:
+        print("No admin user found (row is None).")
+        conn.close()
+        sys.exit(1)
+    print("admin row id,username,role:", row[0], row[1], row[2])
+
+    ctx = CryptContext(schemes=["bcrypt","pbkdf2_sha256","argon2"], deprecated="auto")
+    try:
+        ok, scheme = check_admin(conn, ctx)
+        print("passlib identifies scheme:", scheme)
+        print("verify('admin123') ->", ok)
+    except Exception as e:
+        print("Error while verifying with passlib:", type(e).__name__, e)
+
     conn.close()
-    sys.exit(1)
-
-print("admin row id,username,role:", row[0], row[1], row[3])
-pw = row[2]
-print("password_hash (prefix):", pw[:60], "...")
-# detect scheme with passlib
-ctx = CryptContext(schemes=["bcrypt","pbkdf2_sha256","argon2"], deprecated="auto")
-scheme = ctx.identify(pw)
-print("passlib identifies scheme:", scheme)
-try:
-    ok = ctx.verify("admin123", pw)
-    print("verify('admin123') ->", ok)
-except Exception as e:
-    print("Error while verifying with passlib:", type(e).__name__, e)
-
-conn.close()
@@ -1,27 +1,131 @@
 # fix_logo_copy.py
-from pathlib import Path
+# Removes `shutil.copy*(<logo path>, ...)` statements from the project's .py files (and an enclosing
+# `if` whose body becomes empty). Uses the AST, so only whole statements are touched and files that
+# don't parse are left alone. Run from the project folder:
+#    python fix_logo_copy.py
+import ast
+import hashlib
+import json
+import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 ROOT = Path('.').resolve()
-py_files = list(ROOT.rglob('*.py'))
+# scan cache lives with the app's data, not in the project folder
+CACHE = Path.home() / '.ayurprakriti_app' / 'fix_logo_copy.cache'
+SKIP_DIRS = {'__pycache__', 'venv', '.venv', 'site-packages', '.git'}
+
 
 def backup(p):
     b = p.with_suffix(p.suffix + '.bak')
     shutil.copy(p, b)
 
-for p in py_files:
-    s = p.read_text(encoding='utf-8')
-        backup(p)
-        lines = s.splitlines()
-        new_lines = []
-        skip_next = False
-        for i, L in enumerate(lines):
-                # skip this line (usually shutil.copy(...))
-                continue
-                # skip that whole if block by not adding this line; try to skip small indented block
-                # we will skip next few indented lines if they belong to the if
-                continue
-            new_lines.append(L)
-        p.write_text("\n".join(new_lines), encoding='utf-8')
-        print("Fixed:", p)
-print("Done. Backups (*.bak) created for changed files.")
\ No newline at end of file
+
+def is_logo_copy(stmt, src):
+    # `shutil.copy(...)` / `shutil.copy2(...)` / `shutil.copyfile(...)` whose first argument mentions logo
+    if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call)):
+        return False
+    f = stmt.value.func
+    if not (isinstance(f, ast.Attribute) and isinstance(f.value, ast.Name) and f.value.id == 'shutil'
+            and f.attr.startswith('copy') and stmt.value.args):
+        return False
+    return 'logo' in (ast.get_source_segment(src, stmt.value.args[0]) or '').lower()
+
+
+def plan_edits(stmts, src, lines, edits):
+    # appends (first_line, last_line, replacement_lines) edits; returns True if every stmt is removed
+    removed = 0
+    for st in stmts:
+        if is_logo_copy(st, src):
+            edits.append((st.lineno, st.end_lineno, [])); removed += 1
+            continue
+        blocks = [getattr(st, k) for k in ('body', 'orelse', 'finalbody') if getattr(st, k, None)]
+        blocks += [h.body for h in getattr(st, 'handlers', [])]
+        planned = []
+        for body in blocks:
+            sub = []
+            planned.append((body, plan_edits(body, src, lines, sub), sub))
+        if isinstance(st, ast.If) and all(gone for _, gone, _ in planned):
+            # every branch of the if/elif/else chain emptied: drop the whole chain
+            # (decorator-free, so lineno is its first line)
+            edits.append((st.lineno, st.end_lineno, [])); removed += 1
+            continue
+        for body, gone, sub in planned:
+            if not gone:
+                edits.extend(sub)
+            elif isinstance(st, ast.If) and body is st.orelse:
+                # emptied elif/else branch: remove it, from its `elif`/`else` line on
+                first = body[0].lineno
+                while not lines[first - 1].lstrip().startswith(('elif', 'else')):
+                    first -= 1
+                edits.append((first, st.end_lineno, []))
+            else:
+                indent = lines[body[0].lineno - 1][:body[0].col_offset]
+                edits.append((body[0].lineno, body[-1].end_lineno, [indent + 'pass']))
+    return removed == len(stmts)
+
+
+def fix_source(src):
+    # returns the rewritten source, or None when nothing changes / the file can't be parsed
+    try:
+        tree = ast.parse(src)
+    except SyntaxError:
+        return None
+    lines = src.splitlines(keepends=True)
+    edits = []
+    plan_edits(tree.body, src, [l.rstrip('\r\n') for l in lines], edits)
+    if not edits:
+        return None
+    for first, last, repl in sorted(edits, reverse=True):
+        lines[first - 1:last] = [r + '\n' for r in repl]
+    new = ''.join(lines)
+    try:
+        ast.parse(new)
+    except SyntaxError:
+        return None
+    return new
+
+
+def process(path_str):
+    # runs in a worker: returns (path, sha1 of final content, changed?)
+    p = Path(path_str)
+    data = p.read_bytes()
+    new = fix_source(data.decode('utf-8'))
+    if new is None or new.encode('utf-8') == data:
+        return path_str, hashlib.sha1(data).hexdigest(), False
+    backup(p)
+    p.write_text(new, encoding='utf-8')
+    return path_str, hashlib.sha1(new.encode('utf-8')).hexdigest(), True
+
+
+def main():
+    try:
+        cache = json.loads(CACHE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cache = {}
+    todo = []
+    for p in ROOT.rglob('*.py'):
+        if SKIP_DIRS.intersection(p.parts) or p.resolve() == Path(__file__).resolve():
+            continue
+        key = str(p)
+        mtime = p.stat().st_mtime_ns
+        hit = cache.get(key)
+        # unchanged since the last clean scan: same mtime, or same content after a touch
+        if hit and (hit[0] == mtime or hit[1] == hashlib.sha1(p.read_bytes()).hexdigest()):
+            continue
+        todo.append(key)
+    changed = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            for key, digest, did_change in ex.map(process, todo):
+                cache[key] = [Path(key).stat().st_mtime_ns, digest]
+                if did_change:
+                    changed += 1; print("Fixed:", key)
+    CACHE.parent.mkdir(parents=True, exist_ok=True)
+    CACHE.write_text(json.dumps(cache), encoding='utf-8')
+    print("Done. %d file(s) changed; backups (*.bak) created for changed files." % changed)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 # force_admin_bcrypt.py
-import sqlite3, pathlib, sys
+import pathlib, sys
 from passlib.context import CryptContext
+from admin_db import connect, bulk_upsert_users
 
 DB = pathlib.Path.home() / ".ayurprakriti_app" / "ayurprakriti.db"
 print("Using DB:", DB)
@@ -14,20 +15,9 @@ new_pw = "admin123"
 hashval = ctx.hash(new_pw)
 print("New hash scheme:", ctx.identify(hashval))
 
-conn = sqlite3.connect(str(DB))
-cur = conn.cursor()
-
-cur.execute("SELECT id FROM users WHERE username='admin'")
-if cur.fetchone():
-    cur.execute("UPDATE users SET password_hash=? WHERE username='admin'", (hashval,))
-    print("Updated admin hash.")
-else:
-    cur.execute(
-        "INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,datetime('now'))",
-        ("admin","Administrator", hashval, "admin"),
-    )
-    print("Inserted admin user.")
-
-conn.commit()
+conn = connect(DB)
+created = conn.execute("SELECT datetime('now')").fetchone()[0]
+bulk_upsert_users(conn, [("admin", "Administrator", hashval, "admin", created)])
+print("Admin hash set (inserted or updated).")
 conn.close()
 print("Done. Try login with admin/admin123")
@@ -1,5 +1,6 @@
 # force_admin_pbkdf2.py
-import sqlite3, hashlib, os, shutil, datetime, binascii
+import hashlib, os, shutil, datetime, binascii
+from admin_db import connect, bulk_upsert_users
 
 DB_PATH = os.path.expanduser(r"~\.ayurprakriti_app\ayurprakriti.db")
 if not os.path.exists(DB_PATH):
@@ -19,19 +20,9 @@ new_pw = "admin123"   # change if you want a different password
 new_hash = pbkdf2_hash_password(new_pw)
 print("New pbkdf2 hash:", new_hash[:30], "... (len {})".format(len(new_hash)))
 
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
-# Try update first
-cur.execute("SELECT id, username FROM users WHERE username = ?", ("admin",))
-row = cur.fetchone()
-if row:
-    cur.execute("UPDATE users SET password_hash = ? WHERE username = ?", (new_hash, "admin"))
-    print("Updated admin hash for id", row[0])
-else:
-    # insert admin
-    cur.execute("INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,?)",
-                ("admin","Administrator", new_hash, "admin", datetime.datetime.now().isoformat()))
-    print("Inserted admin user")
-conn.commit()
+conn = connect(DB_PATH)
+# update the hash if admin exists, insert admin otherwise (single upsert, single transaction)
+bulk_upsert_users(conn, [("admin", "Administrator", new_hash, "admin", datetime.datetime.now().isoformat())])
+print("Admin hash set (inserted or updated)")
 conn.close()
 print("Done. Login with admin /", new_pw)
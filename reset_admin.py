@@ -2,10 +2,10 @@
 # Save this file in your project folder and run with:
 #    python .\reset_admin.py
 
-import sqlite3
 import hashlib
 from pathlib import Path
 from datetime import datetime
+from admin_db import connect, bulk_upsert_users, get_pwd_context
 
 # Candidate DB locations (checks these, first that exists will be used)
 candidates = [
@@ -27,12 +27,10 @@ print("Using DB:", DB_PATH)
 # New admin password you want (change here if you want a different one)
 password = "admin123"
 
-# Create hash using passlib if available, else pbkdf2 fallback
+# Create hash with the shared passlib context (pbkdf2_sha256, same as the app) if available, else pbkdf2 fallback
 try:
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    hashed = pwd_context.hash(password)
-    used = "passlib (bcrypt)"
+    hashed = get_pwd_context().hash(password)
+    used = "passlib (pbkdf2_sha256)"
 except Exception:
     # fallback - stable pbkdf2 hash
     salt = b"ayur_salt_v2"
@@ -45,7 +43,7 @@ print("Hash method:", used)
 # ensure parent dir exists
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-conn = sqlite3.connect(str(DB_PATH))
+conn = connect(DB_PATH)
 cur = conn.cursor()
 
 # Ensure users table exists (create simple schema if missing)
@@ -60,22 +58,15 @@ CREATE TABLE IF NOT EXISTS users (
 )
 """)
 
-# Update existing admin or insert
-cur.execute("SELECT id FROM users WHERE username = ?", ("admin",))
-row = cur.fetchone()
-if row:
-    cur.execute(
-        "UPDATE users SET password_hash = ?, display_name = ?, role = ?, created_at = ? WHERE id = ?",
-        (hashed, "Administrator", "admin", datetime.now().isoformat(), row[0]),
-    )
-    print("Updated existing admin password.")
-else:
-    cur.execute(
-        "INSERT INTO users (username, display_name, password_hash, role, created_at) VALUES (?,?,?,?,?)",
-        ("admin", "Administrator", hashed, "admin", datetime.now().isoformat()),
-    )
-    print("Created admin user with password.")
-
 conn.commit()
+
+# Update existing admin or insert (one upsert in one transaction)
+bulk_upsert_users(
+    conn,
+    [("admin", "Administrator", hashed, "admin", datetime.now().isoformat())],
+    update=("password_hash", "display_name", "role", "created_at"),
+)
+print("Admin password set (created or updated).")
+
 conn.close()
 print("Done. Login with username 'admin' and password:", password)
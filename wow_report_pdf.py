@@ -0,0 +1,331 @@
+# wow_report_pdf.py
+# Branded PDF report renderer for AyurPrakriti_Pro_Wow_Report.py. Kept free of Streamlit so it can be imported
+# by the app and by spawned bulk-export worker processes alike; everything a report needs (brand, watermark
+# config, font, asset folder) is passed in, and caches are plain per-process lru_caches.
+import logging
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from xml.sax.saxutils import escape as xml_escape
+
+import numpy as np
+
+logger = logging.getLogger('ayurprakriti_wow')
+
+# ---------------- Lazy reportlab imports ----------------
+@lru_cache(maxsize=1)
+def rl_base():
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.lib import colors
+    from reportlab.pdfgen import canvas
+    return A4, mm, colors, canvas
+
+@lru_cache(maxsize=4)
+def register_dejavu(font_path):
+    # the TTF is parsed/registered once per process; -> True if 'DejaVuSans' can be used
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    try:
+        pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
+        return True
+    except Exception:
+        logger.exception("Font register failed")
+        return False
+
+@lru_cache(maxsize=1)
+def platypus():
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
+    from reportlab.lib.utils import ImageReader
+    return SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak, ImageReader
+
+# ---------------- Radar chart (vector) ----------------
+def make_radar_drawing(prakriti, vikriti, size_mm=120, title='Prakriti vs Vikriti'):
+    # vector version of make_radar_chart for the PDF: same layout (first axis at top, clockwise, 0-100 scale)
+    # drawn with ReportLab shapes, so the PDF path needs no matplotlib render / PNG round-trip
+    from reportlab.graphics.shapes import Drawing, Polygon, Line, String
+    A4, mm, colors, canvas = rl_base()
+    size = size_mm*mm; cx = cy = size/2; R = size*0.36
+    labels = list(prakriti.keys())
+    theta = np.pi/2 - np.linspace(0, 2*np.pi, len(labels), endpoint=False)
+    cos, sin = np.cos(theta), np.sin(theta)
+    def pts(r): return np.column_stack((cx + r*cos, cy + r*sin)).ravel().tolist()
+    d = Drawing(size, size)
+    for frac in (0.25, 0.5, 0.75, 1.0):
+        d.add(Polygon(pts(np.full(len(labels), R*frac)), fillColor=None, strokeColor=colors.lightgrey, strokeWidth=0.5))
+    for l, c_, s_ in zip(labels, cos, sin):
+        d.add(Line(cx, cy, cx + R*c_, cy + R*s_, strokeColor=colors.lightgrey, strokeWidth=0.5))
+        d.add(String(cx + R*1.15*c_, cy + R*1.15*s_ - 3, l, fontSize=9, textAnchor='middle'))
+    series = (('Prakriti', prakriti, (0.12,0.47,0.71), 0.25), ('Vikriti', vikriti, (1.0,0.5,0.05), 0.12))
+    for i, (name, vals, rgb, alpha) in enumerate(series):
+        r = R*np.clip(np.array([vals.get(l, 0) for l in labels], dtype=np.float64), 0, 100)/100
+        d.add(Polygon(pts(r), fillColor=colors.Color(*rgb, alpha=alpha), strokeColor=colors.Color(*rgb), strokeWidth=2))
+        ly = size - 12 - i*11
+        d.add(Line(size - 48, ly + 3, size - 38, ly + 3, strokeColor=colors.Color(*rgb), strokeWidth=2))
+        d.add(String(size - 35, ly, name, fontSize=8))
+    d.add(String(cx, size - 10, title, fontSize=11, textAnchor='middle'))
+    return d
+
+# ---------------- "Wow" plain-language / life-changing advice generator ----------------
+def generate_wow_advice(patient, prakriti_pct, vikriti_pct, psych_pct, career_recs, rel_tips, health_recs):
+    dom = max(prakriti_pct, key=prakriti_pct.get)
+    current = max(vikriti_pct, key=vikriti_pct.get)
+    # One-line charismatic insight (hero)
+    hero = (f"{patient.get('name','You')} — creative energy + steady rituals = powerful results. "
+            f"You're primarily {dom}. Right now you may feel {('slow & heavy' if current=='Kapha' else 'scattered & anxious' if current=='Vata' else 'hot & impatient')}.")
+    # 90-day identity+behavior plan (simple steps)
+    plan_lines = [
+        "90-day transformation plan (small daily actions that become identity):",
+        "1) Identity pledge (Day 1): Write one line: 'I am someone who finishes what they start with calm focus.' Put it on your phone wallpaper.",
+        "2) Daily core ritual (0–21 days): Warm water, 5–10 min oil massage or warming shower, 2 focused work blocks (60–90 min).",
+        "3) Weekly mastery (weeks 3–12): Finish one small creative project every 2–3 weeks and share it (blog, social, colleague).",
+        "4) Accountability (start now): Pick one friend/peer to check progress weekly for 12 weeks (2-min message).",
+        "5) Measure progress: Record morning energy (1–5) and sleep times daily for 90 days; review at day 14, 45, 90.",
+        "6) Recalibrate: If sleep/energy don't improve after 14 days, book a short consult — tweak herbs/doses or routines."
+    ]
+    plan = "\n".join(plan_lines)
+    # Life-changing single habit stack (keep very small)
+    habit_stack = [
+        "Life-changing habit stack (do these in order, takes 15–25 minutes total):",
+        "A) Warm water on waking + 2 min breathing (inhale 4s, exhale 6s)",
+        "B) 5–10 min oil self-massage or 10 min full-body stretching",
+        "C) One 60–90 min focused creative/work block (timer on)",
+        "D) Evening: reflect 2 things done, prepare 1 clear task for next day"
+    ]
+    habit_stack_text = "\n".join(habit_stack)
+    # Concrete "wow" tips (actionable, emotionally resonant)
+    wow_tips = [
+        "- If you want more calm: reduce decision load — only 3 choices for morning clothes/breakfast.",
+        "- If you want more creative output: ship one small thing per week and celebrate it.",
+        "- If you want better relationships: do a 3-minute daily gratitude note for a partner or colleague.",
+        "- If you want better health: commit to 21 days of the routine — habits stick around that mark."
+    ]
+    wow_text = "\n".join(wow_tips)
+    # One-page checklist (copyable)
+    checklist = [
+        "ONE-PAGE ACTION CHECKLIST",
+        "- Morning: warm water + 2 min breathing + 5–10 min oil rub/stretch",
+        "- Work: two focused work blocks (60–90 min each). Timer ON.",
+        "- Movement: daily 25–35 min walk or light yoga.",
+        "- Evening: light dinner by 8 pm, reflect on 2 wins.",
+        "- Weekly: publish/share 1 small creative item; 20-min planning on Sunday.",
+        "- Accountability: weekly check-in with your chosen peer for 12 weeks."
+    ]
+    checklist_text = "\n".join(checklist)
+    # Doctor's short signed note (friendly)
+    doctor_note = ("Doctor's note: Start the 'Start Today' items now. "
+                   "Small, consistent steps matter more than big, rare interventions. "
+                   "We'll review your progress at 2 weeks and tune the plan.")
+    return {'hero': hero, 'plan': plan, 'habit_stack': habit_stack_text, 'wow_text': wow_text, 'checklist': checklist_text, 'doctor_note': doctor_note}
+
+# ---------------- Cached images (logo / signature) ----------------
+@lru_cache(maxsize=8)
+def image_reader(path_str, mtime_ns):
+    # decoded once per file version; mtime_ns in the key picks up a re-uploaded logo/signature
+    return platypus()[-1](path_str)
+
+def cached_image_reader(path):
+    path = Path(path)
+    return image_reader(str(path), path.stat().st_mtime_ns) if path.exists() else None
+
+def scaled_rl_image(path, max_w_mm=36.0, max_h_mm=36.0):
+    A4, mm, colors, canvas = rl_base(); RLImage = platypus()[3]
+    reader = cached_image_reader(path)
+    if reader is None: raise FileNotFoundError(f"{path} not found")
+    px_w, px_h = reader.getSize()
+    scale = min(max_w_mm*mm/px_w, max_h_mm*mm/px_h, 1.0) if px_w > 0 and px_h > 0 else 1.0
+    return RLImage(str(path), width=px_w*scale, height=px_h*scale)
+
+# ---------------- Branded PDF with Cover, Radar, Priority strip ----------------
+@lru_cache(maxsize=4)
+def report_styles(base_font, accent_hex):
+    # built once per font/accent and shared across reports (styles are only read)
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    colors = rl_base()[2]
+    styles = getSampleStyleSheet()
+    accent = colors.HexColor(accent_hex)
+    styles.add(ParagraphStyle(name='Hero', fontName=base_font, fontSize=20, leading=24, alignment=1, spaceAfter=6))
+    styles.add(ParagraphStyle(name='HeroSub', fontName=base_font, fontSize=11, leading=13, alignment=1, textColor=colors.darkgrey))
+    styles.add(ParagraphStyle(name='Section', fontName=base_font, fontSize=12, leading=14, textColor=accent))
+    styles.add(ParagraphStyle(name='Body', fontName=base_font, fontSize=10, leading=12))
+    return styles
+
+def branded_pdf_report(patient, prakriti_pct, vikriti_pct, psych_pct, career_recs, rel_tips, health_recs, out_path,
+                       brand, wconf, include_appendix=False, report_id=None, wow=None, font_path=None, assets_dir=None):
+    # written straight to disk so ReportLab's output is never duplicated in a BytesIO; returns the Path.
+    # font_path: DejaVuSans TTF (else Helvetica); assets_dir: folder holding signature.png / logo.png
+    out_path = Path(out_path)
+    A4, mm, colors, canvas = rl_base()
+    dejavu = register_dejavu(font_path) if font_path else False
+    SimpleDocTemplate, Paragraph, Spacer, RLImage, Table, TableStyle, PageBreak, ImageReader = platypus()
+    try:
+        doc = SimpleDocTemplate(str(out_path), pagesize=A4, leftMargin=18*mm, rightMargin=18*mm, topMargin=18*mm, bottomMargin=18*mm)
+        base_font = 'DejaVuSans' if dejavu else 'Helvetica'
+        styles = report_styles(base_font, brand.get('accent_color','#0F7A61'))
+        flow = []
+        # Cover / Hero page
+        flow.append(Spacer(1,6))
+        # big name
+        flow.append(Paragraph(patient.get('name','Patient Name'), styles['Hero']))
+        if wow and wow.get('hero'):
+            flow.append(Paragraph(wow['hero'], styles['HeroSub']))
+        flow.append(Spacer(1,6))
+        # badges row (Dominant / Current / Top career)
+        badges = [
+            Paragraph(f"<b>Dominant</b><br/>{max(prakriti_pct,key=prakriti_pct.get)}", styles['Body']),
+            Paragraph(f"<b>Current</b><br/>{max(vikriti_pct,key=vikriti_pct.get)}", styles['Body']),
+            Paragraph(f"<b>Top career</b><br/>{career_recs[0]['role'] if career_recs else '-'}", styles['Body'])
+        ]
+        table = Table([[badges[0], badges[1], badges[2]]], colWidths=[60*mm,60*mm,60*mm])
+        table.setStyle(TableStyle([('BACKGROUND',(0,0),(-1,0),colors.whitesmoke),('VALIGN',(0,0),(-1,-1),'MIDDLE'),('ALIGN',(0,0),(-1,-1),'CENTER')]))
+        flow.append(table)
+        flow.append(Spacer(1,8))
+        # radar chart on cover if available
+        try:
+            flow.append(make_radar_drawing(prakriti_pct, vikriti_pct))
+        except Exception:
+            logger.exception("radar drawing failed")
+        flow.append(Spacer(1,8))
+        # Doctor note + signature (if available)
+        doc_note = wow.get('doctor_note') if wow else ''
+        if doc_note:
+            flow.append(Paragraph(f"<i>{doc_note}</i>", styles['Body']))
+            sig_path = Path(assets_dir) / 'signature.png' if assets_dir else None
+            if sig_path and sig_path.exists():
+                try:
+                    sig_img = scaled_rl_image(sig_path, max_w_mm=40, max_h_mm=20)
+                    flow.append(sig_img)
+                except Exception:
+                    pass
+        flow.append(PageBreak())
+
+        # Main content - summary, charts, tables
+        flow.append(Paragraph("Executive summary", styles['Section']))
+        flow.append(Paragraph("Below are clear findings and prioritized actions to start today.", styles['Body']))
+        flow.append(Spacer(1,6))
+        # charts area (radar + bar charts)
+        try:
+            flow.append(make_radar_drawing(prakriti_pct, vikriti_pct)); flow.append(Spacer(1,6))
+        except Exception:
+            logger.exception("radar drawing failed")
+
+        # Priority action strip (Start today / This week / This month)
+        priority = [
+            ("Start today", "Warm water on waking; 5–10 min warm oil rub or stretch; one focused 60–90 min block"),
+            ("This week", "Add a second focused block; daily 20–35 min walk; start a small micro-project"),
+            ("This month", "Finish + share one creative project; set a weekly accountability check-in")
+        ]
+        cols_row = []
+        for title, text in priority:
+            p = Paragraph(f"<b>{title}</b><br/>{text}", styles['Body'])
+            cols_row.append(p)
+        strip = Table([cols_row], colWidths=[60*mm,60*mm,60*mm])
+        strip.setStyle(TableStyle([
+            ('BACKGROUND',(0,0),(-1,-1),colors.Color(0.96,0.98,0.95)),
+            ('BOX',(0,0),(-1,-1),0.5,colors.lightgrey),
+            ('VALIGN',(0,0),(-1,-1),'TOP'),
+            ('ALIGN',(0,0),(-1,-1),'CENTER'),
+            ('LEFTPADDING',(0,0),(-1,-1),6), ('RIGHTPADDING',(0,0),(-1,-1),6)
+        ]))
+        flow.append(strip); flow.append(Spacer(1,8))
+
+        # Recommendations: Career / Relationship / Health short blocks
+        flow.append(Paragraph("Top recommendations (short)", styles['Section']))
+        flow.append(Paragraph("Career: " + (career_recs[0]['role'] if career_recs else '—'), styles['Body']))
+        flow.append(Paragraph("Relationship: " + (rel_tips[0][1] if rel_tips else '—'), styles['Body']))
+        flow.append(Paragraph("Health: " + (', '.join(health_recs.get('diet',[])) if health_recs else '—'), styles['Body']))
+        flow.append(Spacer(1,8))
+
+        # Include long plain-language/wow plan as appendix if requested
+        if include_appendix and wow:
+            flow.append(PageBreak())
+            flow.append(Paragraph("APPENDIX — Transformation Plan", styles['Section']))
+            flow.append(Spacer(1,6))
+            # one Paragraph per section (lines joined with <br/>) instead of one per line
+            sections = [('90-day transformation (practical)', 'plan'), ('Habit stack (daily)', 'habit_stack'),
+                        ('Concrete wow tips', 'wow_text'), ('One-page checklist', 'checklist')]
+            for i, (heading, key) in enumerate(sections):
+                if i: flow.append(Spacer(1,6))
+                flow.append(Paragraph(f"<b>{heading}</b>", styles['Body']))
+                flow.append(Paragraph('<br/>'.join(xml_escape(line) for line in wow[key].split('\n')), styles['Body']))
+
+        # footer contact block
+        flow.append(PageBreak())
+        flow.append(Paragraph(f"{brand['clinic_name']} — {brand['doctor']} — {brand['phone']} — {brand['email']}", styles['Body']))
+
+        # page watermark & footer
+        # resolved once per report, not once per page
+        logo_reader = cached_image_reader(Path(assets_dir) / 'logo.png') if assets_dir and wconf.get('show_footer_logo', True) else None
+        def _draw_footer_and_watermark(canvas_obj, doc_obj):
+            try:
+                canvas_obj.saveState()
+                W,H = A4
+                try:
+                    canvas_obj.setFont('DejaVuSans', 40) if dejavu else canvas_obj.setFont('Helvetica-Bold', 40)
+                except Exception:
+                    canvas_obj.setFont('Helvetica-Bold', 40)
+                opacity = float(wconf.get('watermark_opacity', 0.06))
+                try:
+                    canvas_obj.setFillAlpha(opacity)
+                except Exception:
+                    canvas_obj.setFillColorRGB(0.7,0.7,0.7)
+                canvas_obj.translate(W/2.0, H/2.0); canvas_obj.rotate(30)
+                canvas_obj.drawCentredString(0, 0, wconf.get('watermark_text', brand['clinic_name']))
+                canvas_obj.restoreState()
+            except Exception:
+                logger.exception("watermark failed")
+            try:
+                canvas_obj.saveState()
+                footer_y = 15*mm
+                canvas_obj.setStrokeColor(colors.lightgrey); canvas_obj.setLineWidth(0.5)
+                canvas_obj.line(18*mm, footer_y + 8, (A4[0]-18*mm), footer_y + 8)
+                x = 20*mm
+                if logo_reader is not None:
+                    try:
+                        iw, ih = logo_reader.getSize(); target_h = 10*mm; scale = target_h/ih
+                        canvas_obj.drawImage(logo_reader, x, footer_y - 2, width=iw*scale, height=ih*scale, mask='auto'); x += (iw*scale) + 4
+                    except Exception:
+                        pass
+                canvas_obj.setFont('Helvetica', 8)
+                canvas_obj.drawString(x, footer_y, f"{brand['clinic_name']} — {brand['phone']} — {brand['email']}")
+                page_num = canvas_obj.getPageNumber()
+                canvas_obj.drawRightString(A4[0] - 18*mm, footer_y, wconf.get('page_number_format','Page {page}').format(page=page_num))
+                canvas_obj.restoreState()
+            except Exception:
+                logger.exception("footer failed")
+        doc.build(flow, onFirstPage=_draw_footer_and_watermark, onLaterPages=_draw_footer_and_watermark)
+        return out_path
+    except Exception as e:
+        logger.exception("Branded PDF failed: %s", e)
+        # fallback simple canvas
+        c = canvas.Canvas(str(out_path), pagesize=A4)
+        c.drawString(50,800, f"{brand['clinic_name']} - Simple fallback report")
+        c.save(); return out_path
+
+# ---------------- Bulk export worker ----------------
+def render_bulk_report(job):
+    # job = (payload, out_path, brand, wconf, font_path, assets_dir); everything the report needs travels
+    # in the job, so a spawned worker only has to import this module
+    d, out_path, brand, wconf, font_path, assets_dir = job
+    p, prak, vik, psy = d['patient'], d['prakriti_pct'], d['vikriti_pct'], d['psych_pct']
+    career, rel, health = d.get('career_recs', []), d.get('relationship_tips', []), d.get('health_recs', {})
+    wow = generate_wow_advice(p, prak, vik, psy, career, rel, health)
+    return str(branded_pdf_report(p, prak, vik, psy, career, rel, health, out_path, brand, wconf, include_appendix=True,
+                                  wow=wow, font_path=font_path, assets_dir=assets_dir))
+
+def render_bulk_reports(jobs):
+    # reportlab rendering is CPU-bound and holds the GIL, so fan out to a spawned process pool
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(jobs)), mp_context=mp.get_context('spawn')) as ex:
+            return list(ex.map(render_bulk_report, jobs))
+    return [render_bulk_report(j) for j in jobs]
+
+
+if __name__ == '__main__':
+    # bulk-export entry point, run by the app as `python wow_report_pdf.py`: jobs as a JSON list on stdin,
+    # output paths as a JSON list on stdout. A separate process because spawn re-imports the parent's
+    # __main__, which inside Streamlit is the app script itself
+    import json, sys
+    json.dump(render_bulk_reports(json.load(sys.stdin)), sys.stdout)